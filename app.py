@@ -4,183 +4,350 @@ Probepaket Finder WebApp
 Eine moderne Web-Anwendung zur Suche nach verfügbaren Probepaketen
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask, render_template, request, jsonify
 import os
-import pandas as pd
-from google.oauth2.service_account import Credentials as ServiceAccountCredentials
-from googleapiclient.discovery import build
 
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import json
-from datetime import datetime, timedelta
-import base64
+from datetime import datetime
+import logging
+import threading
+
+from refresher import JOB_DONE, JOB_FAILED, BackgroundRefresher, RefreshSchedule, load_ttl_config
+from snapshot import DataSnapshot, SnapshotStore, load_snapshot, save_snapshot
+from log_setup import configure_logging
+from http_cache import cached_json, compressed_json, ndjson_stream
+from result_cache import SearchResultCache
+from ranking import PageRequest
+from color_table import load_color_synonyms
+from sheets_fetch import ParallelFetcher, http_factory_for
+from sheets_sources import connect as connect_sheets, parse_latency
+from startup import StartupReport
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Kaltstart-Messung; schwere Abhängigkeiten (googleapiclient, numpy) werden erst bei Bedarf importiert
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 10000))
+startup = StartupReport(_IMPORT_STARTED, STARTUP_BUDGET_MS)
+startup.since('imports', _IMPORT_STARTED)
 
 app = Flask(__name__)
 
+# A1-Bereiche der Tabellenblätter (per Umgebungsvariable einschränkbar, z.B. 'Lager_neu!A1:ZZ182')
+SHEET_RANGES = {
+    'Farben': os.getenv('SHEET_RANGE_FARBEN', 'Farben'),
+    'monday': os.getenv('SHEET_RANGE_MONDAY', 'monday'),
+    'Lager_neu': os.getenv('SHEET_RANGE_LAGER', 'Lager_neu'),
+}
+# Teilbereiche von Lager_neu, die ohne das ganze Blatt nachgeladen werden können:
+# Name -> (erste Zeile 0-basiert, Anzahl Zeilen)
+LAGER_PARTIAL_ROWS = {
+    'Lager_neu:header': (0, 1),        # Paketnummern
+    'Lager_neu:veredelung': (179, 3),  # Siebdruck, Digitaldruck, Stick
+}
+_LAGER_SHEET = SHEET_RANGES['Lager_neu'].split('!')[0]
+# Alle Aktualisierungsbereiche mit ihrem A1-Bereich
+REFRESH_UNITS = dict(SHEET_RANGES, **{
+    name: f"{_LAGER_SHEET}!{first_row + 1}:{first_row + count}"
+    for name, (first_row, count) in LAGER_PARTIAL_ROWS.items()
+})
+# Maximales Alter pro Bereich in Sekunden (0 = nur zusammen mit dem ganzen Blatt laden)
+SHEET_TTLS = load_ttl_config(
+    defaults={'Farben': 3600, 'monday': 60, 'Lager_neu': 600, 'Lager_neu:header': 0, 'Lager_neu:veredelung': 0},
+    env_names={
+        'Farben': 'SHEET_TTL_FARBEN',
+        'monday': 'SHEET_TTL_MONDAY',
+        'Lager_neu': 'SHEET_TTL_LAGER',
+        'Lager_neu:header': 'SHEET_TTL_LAGER_HEADER',
+        'Lager_neu:veredelung': 'SHEET_TTL_LAGER_VEREDELUNG',
+    },
+    config_path=os.getenv('SHEETS_CONFIG_FILE')
+)
+# Cache-Control pro Endpoint; Produkte und Farben werden per ETag revalidiert
+CACHE_CONTROL = {
+    'products': 'no-cache',
+    'colors': 'private, max-age=60, must-revalidate',
+    'search': 'no-store',
+}
+# Größe des Suchergebnis-Caches (0 Einträge deaktiviert ihn)
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 1024))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv('SEARCH_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+# Maximale Anzahl Suchen pro /api/search/batch Aufruf
+MAX_BATCH_QUERIES = int(os.getenv('MAX_BATCH_QUERIES', 200))
+# Such-Engine: 'python' (invertierter Index) oder 'numpy' (Farbcode-Matrix, gleiche Ergebnisse)
+SEARCH_ENGINES = ('python', 'numpy')
+SEARCH_ENGINE = os.getenv('SEARCH_ENGINE', 'python').lower()
+# 'batch' (ein batchGet) oder 'parallel' (ein values.get pro Bereich, gleichzeitig)
+SHEETS_FETCH_MODE = os.getenv('SHEETS_FETCH_MODE', 'batch').lower()
+# Timeout pro Anfrage an die Sheets API in Sekunden
+SHEETS_TIMEOUT_SECONDS = float(os.getenv('SHEETS_TIMEOUT_SECONDS', 30))
+# Datenquelle: 'live' (Google), 'fake' (Fixture-Datei) oder 'record' (live und in die Fixture-Datei schreiben)
+SHEETS_SOURCE = os.getenv('SHEETS_SOURCE', 'live').lower()
+SHEETS_FIXTURE_FILE = os.getenv('SHEETS_FIXTURE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    'cache', 'sheets_fixture.json'))
+# Herkunft der Daten im gespeicherten Datenstand ('record' liefert die Live-Daten)
+SNAPSHOT_SOURCE = f'fake:{os.path.abspath(SHEETS_FIXTURE_FILE)}' if SHEETS_SOURCE == 'fake' else 'live'
+# Verhalten der Fixture-Quelle: Latenz in ms ('50' oder '20-200'), Fehleranteil und -status
+SHEETS_FAKE_LATENCY_MS = parse_latency(os.getenv('SHEETS_FAKE_LATENCY_MS'))
+SHEETS_FAKE_ERROR_RATE = float(os.getenv('SHEETS_FAKE_ERROR_RATE', 0))
+SHEETS_FAKE_ERROR_STATUS = int(os.getenv('SHEETS_FAKE_ERROR_STATUS', 503))
+# Gruppen gleichwertiger Farbwünsche aus der Konfigurationsdatei (z.B. [["Rot", "Red"]])
+COLOR_SYNONYMS = load_color_synonyms(os.getenv('SHEETS_CONFIG_FILE'))
+# FORMATTED_VALUE liefert die Zellen als Strings, so wie sie im Sheet angezeigt werden. Index, Katalog
+# und Matrix setzen das voraus (Paketnummern wie in monday, '1' für Veredelungen); mit
+# UNFORMATTED_VALUE bzw. FORMULA kämen Zahlen, daher werden andere Werte beim Start abgelehnt
+VALUE_RENDER_OPTIONS = ('FORMATTED_VALUE',)
+VALUE_RENDER_OPTION = os.getenv('SHEETS_VALUE_RENDER_OPTION', 'FORMATTED_VALUE').upper()
+if VALUE_RENDER_OPTION not in VALUE_RENDER_OPTIONS:
+    raise ValueError(f"Nicht unterstützte SHEETS_VALUE_RENDER_OPTION: {VALUE_RENDER_OPTION} "
+                     f"(möglich: {', '.join(VALUE_RENDER_OPTIONS)})")
+
 class ProbepaketFinder:
-    def __init__(self, spreadsheet_id: str):
-        """Initialisiert den Probepaket Finder."""
+    def __init__(self, spreadsheet_id: str, service=None, snapshot_path: Optional[str] = None,
+                 engine: str = None):
+        """
+        Initialisiert den Probepaket Finder.
+        
+        Args:
+            spreadsheet_id: Die ID der Google Sheets Tabelle
+            service: Bereits authentifizierter Sheets Service (sonst beim ersten Zugriff)
+            snapshot_path: Datei, in der der letzte Datenstand für Kaltstarts abgelegt wird
+            engine: Such-Engine, 'python' (PaketIndex) oder 'numpy' (Farbcode-Matrix); Standard SEARCH_ENGINE
+        """
         self.spreadsheet_id = spreadsheet_id
-        self.service = self._authenticate_google_sheets()
-        self.lager_data = None
-        self.farben_data = None
-        self.monday_data = None
-        self.last_update = None
+        self.snapshot_path = snapshot_path
+        self._service = service
+        self._service_lock = threading.Lock()
+        # Langlebiger Sheets Client (None, wenn ein fertiger Service übergeben wurde)
+        self._client = None
+        # Thread-Pool für SHEETS_FETCH_MODE=parallel (beim ersten Laden angelegt)
+        self._fetcher = None
+        # Fehler des letzten fehlgeschlagenen Ladevorgangs (None nach Erfolg)
+        self.last_error: Optional[Exception] = None
+        # Suchergebnisse pro Datenstand
+        self.result_cache = SearchResultCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES)
+        # Zeitpunkt des letzten Abrufs pro Aktualisierungsbereich
+        self.schedule = RefreshSchedule(SHEET_TTLS)
+        # Geladene Daten liegen als unveränderliche, versionierte Snapshots vor
+        self.engine = engine or SEARCH_ENGINE
+        if self.engine not in SEARCH_ENGINES:
+            raise ValueError(f"Unbekannte Such-Engine: {self.engine}")
+        self.store = SnapshotStore(self.engine, COLOR_SYNONYMS)
+    
+    @property
+    def service(self):
+        """Sheets Service; Authentifizierung erst beim ersten Zugriff."""
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    self._service = self._authenticate_google_sheets()
+        return self._service
+    
+    def restore_snapshot(self) -> bool:
+        """Übernimmt den zuletzt gespeicherten Datenstand von der Platte, falls vorhanden."""
+        if not self.snapshot_path:
+            return False
+        try:
+            snapshot = load_snapshot(self.snapshot_path, self.spreadsheet_id, SNAPSHOT_SOURCE, self.engine,
+                                     COLOR_SYNONYMS)
+        except Exception as e:
+            logger.warning("Gespeicherter Datenstand nicht lesbar: %s", e)
+            return False
+        if snapshot is None:
+            logger.info("Kein verwendbarer Datenstand auf der Platte", extra={'path': self.snapshot_path})
+            return False
+        self.store.restore(snapshot)
+        logger.info("Datenstand von Platte geladen",
+                    extra={'version': snapshot.version, 'last_update': snapshot.last_update, 'path': self.snapshot_path})
+        return True
+    
+    @property
+    def snapshot(self) -> DataSnapshot:
+        """Aktueller Datenstand; pro Anfrage einmal abrufen und weiterreichen."""
+        return self.store.current()
+    
+    @property
+    def last_update(self) -> Optional[datetime]:
+        return self.snapshot.last_update
         
     def _authenticate_google_sheets(self):
         """Authentifiziert bei Google Sheets API (Service Account, Render-tauglich)."""
-        SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
-
-        # Support both names so you don't have to rename your Render secret
-        raw = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON') or os.getenv('GOOGLE_CREDENTIALS_JSON')
-        creds = None
-
         try:
-            if raw:
-                # Env var contains the **full service account JSON** pasted as-is
-                info = json.loads(raw)
-                if info.get('type') != 'service_account':
-                    raise ValueError(f"Expected a service_account JSON, got type={info.get('type')!r}")
-                creds = ServiceAccountCredentials.from_service_account_info(info, scopes=SCOPES)
-
-            elif os.getenv('GOOGLE_APPLICATION_CREDENTIALS') and os.path.exists(os.getenv('GOOGLE_APPLICATION_CREDENTIALS')):
-                # Or: use a Secret File mounted at that path
-                creds = ServiceAccountCredentials.from_service_account_file(
-                    os.getenv('GOOGLE_APPLICATION_CREDENTIALS'),
-                    scopes=SCOPES
-                )
-            else:
-                raise RuntimeError(
-                    "No service account credentials found. "
-                    "Set GOOGLE_SERVICE_ACCOUNT_JSON (or GOOGLE_CREDENTIALS_JSON) "
-                    "or mount a Secret File and set GOOGLE_APPLICATION_CREDENTIALS."
-                )
-
-            # Build Sheets service. cache_discovery=False avoids writing .cache on ephemeral FS
-            service = build('sheets', 'v4', credentials=creds, cache_discovery=False)
-            return service
-
+            # Credentials, Service und Transporte werden prozessweit wiederverwendet
+            self._client = connect_sheets(SHEETS_SOURCE, SHEETS_TIMEOUT_SECONDS, SHEETS_FIXTURE_FILE,
+                                          latency_ms=SHEETS_FAKE_LATENCY_MS, error_rate=SHEETS_FAKE_ERROR_RATE,
+                                          error_status=SHEETS_FAKE_ERROR_STATUS)
+            return self._client.service
         except Exception as e:
             # Keep logs minimal—do NOT print key material
-            print(f"❌ Auth error: {e.__class__.__name__}: {e}")
+            logger.error("Auth error: %s: %s", e.__class__.__name__, e)
             raise
     
-    def load_data(self):
-        """Lädt alle relevanten Daten aus den Google Sheets."""
-        print("🔍 DEBUG: Starte Datenladevorgang...")
-        print(f"🔍 DEBUG: Spreadsheet ID: {self.spreadsheet_id}")
-        print(f"🔍 DEBUG: Service verfügbar: {self.service is not None}")
+    def _thread_http(self):
+        """Http-Objekt des aufrufenden Threads mit gültigem Token (None = Transport des Service)."""
+        if self._client is None:
+            return None
+        self._client.ensure_token()
+        return self._client.http()
+    
+    def load_data(self, units: Optional[List[str]] = None) -> bool:
+        """
+        Lädt Daten aus den Google Sheets (ein batchGet für alle angeforderten Bereiche).
         
-        # Daten aus Farben laden (enthält Produkte und deren Farben)
-        try:
-            print("🔍 DEBUG: Lade Farben Daten...")
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range='Farben'
-            ).execute()
-            self.farben_data = result.get('values', [])
-            print(f"✅ DEBUG: Farben Daten geladen: {len(self.farben_data)} Zeilen")
-            if self.farben_data:
-                print(f"🔍 DEBUG: Erste Farben Zeile: {self.farben_data[0] if self.farben_data else 'Leer'}")
-        except Exception as e:
-            print(f"❌ DEBUG: Fehler beim Laden von Farben: {e}")
-            import traceback
-            print(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
-            
-        # Daten aus Monday laden (enthält Verfügbarkeitsstatus)
-        try:
-            print("🔍 DEBUG: Lade Monday Daten...")
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range='monday'
-            ).execute()
-            self.monday_data = result.get('values', [])
-            print(f"✅ DEBUG: Monday Daten geladen: {len(self.monday_data)} Zeilen")
-            if self.monday_data:
-                print(f"🔍 DEBUG: Erste Monday Zeile: {self.monday_data[0] if self.monday_data else 'Leer'}")
-        except Exception as e:
-            print(f"❌ DEBUG: Fehler beim Laden von Monday: {e}")
-            import traceback
-            print(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
-            
-        # Daten aus Lager_neu laden (enthält tatsächliche Paket-Inhalte)
+        Args:
+            units: Aktualisierungsbereiche aus REFRESH_UNITS; Standard sind alle drei
+                Tabellenblätter. Nicht angeforderte Blätter werden aus dem aktuellen
+                Datenstand übernommen.
+        
+        Returns:
+            True, wenn die Bereiche erfolgreich geladen wurden
+        """
+        current = self.snapshot
+        if units is None or current.version == 0:
+            # Farben (Produkte und deren Farben), monday (Verfügbarkeitsstatus) und
+            # Lager_neu (tatsächliche Paket-Inhalte) in einem Round Trip laden, damit
+            # alle drei Tabellenblätter denselben Stand haben
+            units = list(SHEET_RANGES)
+        # Teilbereiche sind im ganzen Blatt bereits enthalten
+        if 'Lager_neu' in units:
+            units = [unit for unit in units if unit not in LAGER_PARTIAL_ROWS]
+        ranges = [REFRESH_UNITS[unit] for unit in units]
         try:
-            print("🔍 DEBUG: Lade Lager_neu Daten...")
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range='Lager_neu'
-            ).execute()
-            self.lager_data = result.get('values', [])
-            print(f"✅ DEBUG: Lager_neu Daten geladen: {len(self.lager_data)} Zeilen")
-            if self.lager_data:
-                print(f"🔍 DEBUG: Erste Lager_neu Zeile: {self.lager_data[0] if self.lager_data else 'Leer'}")
+            started = time.perf_counter()
+            if SHEETS_FETCH_MODE == 'parallel':
+                fetched, sheet_stats = self._fetch_parallel(units)
+            else:
+                fetched, sheet_stats = self._fetch_batch(units)
+            duration_ms = (time.perf_counter() - started) * 1000
         except Exception as e:
-            print(f"❌ DEBUG: Fehler beim Laden von Lager_neu: {e}")
-            import traceback
-            print(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
-            
-        self.last_update = datetime.now()
-        print(f"🔍 DEBUG: Datenladevorgang abgeschlossen um {self.last_update}")
+            # Bisheriger Datenstand bleibt aktiv
+            logger.exception("Fehler beim Laden der Tabellenblätter", extra={'ranges': ranges})
+            self.last_error = e
+            return False
+        self.last_error = None
+        
+        values = {name: fetched.get(name) for name in SHEET_RANGES}
+        
+        # Teilbereiche in die aktuellen Lager_neu Zeilen einsetzen
+        partial_units = [unit for unit in units if unit in LAGER_PARTIAL_ROWS]
+        if partial_units:
+            lager = [list(row) for row in current.lager_data]
+            for unit in partial_units:
+                first_row, count = LAGER_PARTIAL_ROWS[unit]
+                while len(lager) < first_row + count:
+                    lager.append([])
+                for i in range(count):
+                    lager[first_row + i] = fetched[unit][i] if i < len(fetched[unit]) else []
+            while lager and not lager[-1]:
+                lager.pop()
+            values['Lager_neu'] = lager
+        
+        self.schedule.mark_fetched(units + (list(LAGER_PARTIAL_ROWS) if 'Lager_neu' in units else []))
+        
+        load_stats = {
+            'dauer_ms': round(duration_ms, 1),
+            'bytes': sum(stats['bytes'] for stats in sheet_stats.values()),
+            'zeilen': {unit: len(rows) for unit, rows in fetched.items()},
+            'ranges': ranges,
+            'modus': SHEETS_FETCH_MODE
+        }
+        if SHEETS_FETCH_MODE == 'parallel':
+            load_stats['bereiche'] = sheet_stats
+        # Neuen Datenstand inkl. Suchindex aufbauen und atomar veröffentlichen
+        snapshot = self.store.publish(values['Farben'], values['monday'], values['Lager_neu'], load_stats)
+        if snapshot is current:
+            # Inhalt unverändert: Version, Caches und gespeicherte Datei bleiben gültig
+            logger.info("Sheets geladen, keine Änderungen", extra={'version': snapshot.version, **load_stats})
+            return True
+        logger.info("Sheets geladen", extra={'version': snapshot.version, **snapshot.load_stats})
+        
+        # Für den nächsten Kaltstart auf der Platte ablegen
+        if self.snapshot_path:
+            try:
+                save_snapshot(snapshot, self.snapshot_path, self.spreadsheet_id, SNAPSHOT_SOURCE)
+            except Exception as e:
+                logger.warning("Datenstand konnte nicht gespeichert werden: %s", e)
+        return True
     
-    def get_available_products(self) -> List[str]:
-        """Gibt eine Liste aller verfügbaren Produkte zurück."""
-        print("🔍 DEBUG: get_available_products aufgerufen")
-        print(f"🔍 DEBUG: Farben Daten verfügbar: {self.farben_data is not None}")
-        print(f"🔍 DEBUG: Farben Daten Länge: {len(self.farben_data) if self.farben_data else 0}")
+    def _fetch_batch(self, units: List[str]) -> Tuple[Dict[str, List[List[str]]], Dict[str, Dict]]:
+        """Alle Bereiche in einem batchGet (ein Round Trip, alle Blätter auf demselben Stand)."""
+        response_sizes = []
+        request = self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[REFRESH_UNITS[unit] for unit in units],
+            valueRenderOption=VALUE_RENDER_OPTION,
+            majorDimension='ROWS',
+            fields='valueRanges(range,values)'
+        )
+        # Größe der Antwort mitschneiden, bevor googleapiclient sie parst
+        postproc = request.postproc
+        def _measure(resp, content):
+            response_sizes.append(len(content or b''))
+            return postproc(resp, content)
+        request.postproc = _measure
         
-        if not self.farben_data:
-            print("❌ DEBUG: Keine Farben Daten verfügbar")
-            return []
-            
-        products = []
-        print("🔍 DEBUG: Durchlaufe Farben Daten...")
-        for i, row in enumerate(self.farben_data):
-            print(f"🔍 DEBUG: Zeile {i}: {row}")
-            if row and len(row) > 0:
-                product_name = row[0].strip()
-                print(f"🔍 DEBUG: Produktname: '{product_name}'")
-                # Nur echte Produktnamen hinzufügen (nicht Farben)
-                if (product_name and 
-                    product_name not in products and 
-                    not any(color_word in product_name.lower() for color_word in 
-                           ['blue', 'white', 'black', 'green', 'red', 'pink', 'orange', 'yellow', 'purple', 'grey', 'brown', 'apricot'])):
-                    products.append(product_name)
-                    print(f"✅ DEBUG: Produkt hinzugefügt: '{product_name}'")
-                else:
-                    print(f"⏭️ DEBUG: Produkt übersprungen: '{product_name}'")
-        
-        result = sorted(products)
-        print(f"🔍 DEBUG: Finale Produktliste: {result}")
-        return result
-    
-    def get_available_colors(self, product: str) -> List[str]:
-        """Gibt eine Liste aller verfügbaren Farben für ein Produkt zurück."""
-        if not self.farben_data:
-            return ['Egal']
-            
-        colors = ['Egal']  # "Egal" immer als erste Option
-        for i, row in enumerate(self.farben_data):
-            if row and len(row) > 0 and row[0].strip() == product:
-                # Die Farben stehen in der nächsten Zeile (i+1)
-                if i + 1 < len(self.farben_data):
-                    color_row = self.farben_data[i + 1]
-                    for color in color_row:
-                        if color and color.strip():
-                            color_name = color.strip()
-                            if color_name not in colors:
-                                colors.append(color_name)
-        
-        return colors  # "Egal" ist bereits an Position 0
-    
-    def get_available_packages(self) -> List[Dict]:
+        started = time.perf_counter()
+        result = request.execute(http=self._thread_http())
+        stats = {'dauer_ms': round((time.perf_counter() - started) * 1000, 1), 'bytes': sum(response_sizes)}
+        
+        value_ranges = result.get('valueRanges', [])
+        fetched = {unit: (value_ranges[i].get('values', []) if i < len(value_ranges) else [])
+                   for i, unit in enumerate(units)}
+        return fetched, {'batchGet': stats}
+    
+    def _fetch_parallel(self, units: List[str]) -> Tuple[Dict[str, List[List[str]]], Dict[str, Dict]]:
+        """Jeder Bereich mit eigenem values.get, gleichzeitig über einen Thread-Pool."""
+        service = self.service
+        if self._fetcher is None:
+            with self._service_lock:
+                if self._fetcher is None:
+                    http_factory = (self._client.new_http if self._client is not None
+                                    else http_factory_for(service, SHEETS_TIMEOUT_SECONDS))
+                    self._fetcher = ParallelFetcher(http_factory, max_workers=len(REFRESH_UNITS),
+                                                    timeout=SHEETS_TIMEOUT_SECONDS)
+        if self._client is not None:
+            # Einmal vorab erneuern statt gleichzeitig in jedem Worker
+            self._client.ensure_token()
+        fetched = {}
+        sheet_stats = {}
+        for unit, rows, stats in self._fetcher.fetch(service, self.spreadsheet_id,
+                                                     {unit: REFRESH_UNITS[unit] for unit in units},
+                                                     VALUE_RENDER_OPTION):
+            fetched[unit] = rows
+            sheet_stats[unit] = stats
+        return fetched, sheet_stats
+    
+    def refresh_due(self) -> bool:
+        """Lädt nur die Bereiche, deren TTL abgelaufen ist (True, wenn nichts fällig war)."""
+        units = self.schedule.due()
+        if not units:
+            return True
+        return self.load_data(units)
+    
+    def get_available_products(self, snapshot: Optional[DataSnapshot] = None) -> List[str]:
+        """Gibt eine Liste aller verfügbaren Produkte zurück (vorberechnet im Katalog)."""
+        snapshot = snapshot or self.snapshot
+        return list(snapshot.catalog.products)
+    
+    def get_available_colors(self, product: str, snapshot: Optional[DataSnapshot] = None) -> List[str]:
+        """Gibt eine Liste aller verfügbaren Farben für ein Produkt zurück ("Egal" an Position 0)."""
+        snapshot = snapshot or self.snapshot
+        return snapshot.catalog.colors_for(product)
+    
+    def get_available_packages(self, snapshot: Optional[DataSnapshot] = None) -> List[Dict]:
         """Gibt eine Liste aller verfügbaren Probepakete zurück."""
-        if not self.monday_data:
+        snapshot = snapshot or self.snapshot
+        if not snapshot.monday_data:
             return []
             
         available_packages = []
         
         # Durch alle Zeilen in Monday iterieren (ab Zeile 1, da Zeile 0 Header ist)
-        for row in self.monday_data[1:]:
+        for row in snapshot.monday_data[1:]:
             if len(row) < 2:  # Mindestens Element und Status
                 continue
                 
@@ -208,203 +375,358 @@ class ProbepaketFinder:
         
         return available_packages
     
-    def find_matching_packages(self, search_criteria: List[Dict], veredelung_required: List[str] = None) -> List[Dict]:
+    def find_matching_packages(self, search_criteria: List[Dict], veredelung_required: List[str] = None,
+                               snapshot: Optional[DataSnapshot] = None,
+                               page: Optional[PageRequest] = None) -> List[Dict]:
         """
         Findet Probepakete, die alle gewünschten Produkte in den gewünschten Farben enthalten.
-        Verwendet die Lager_neu Tabelle für präzise Suche.
+        Verwendet den vorberechneten Index über Lager_neu (siehe PaketIndex); die
+        Treffer werden pro Datenstand im SearchResultCache gehalten.
         
         Args:
             search_criteria: Liste von Dictionaries mit 'product' und 'color' Keys
             veredelung_required: Liste von gewünschten Veredelungen (Siebdruck, Stick, Digitaldruck)
+            snapshot: Datenstand, gegen den gesucht wird (Standard: aktueller Stand)
+            page: Sortierung und Seite (Standard: alle Treffer nach Relevanz)
         """
-        if not self.lager_data or not self.monday_data or not search_criteria:
-            return []
+        snapshot = snapshot or self.snapshot
+        return list(self.search_page(search_criteria, veredelung_required, snapshot, page)[0])
+    
+    def iter_matching_packages(self, search_criteria: List[Dict], veredelung_required: List[str] = None,
+                               snapshot: Optional[DataSnapshot] = None,
+                               min_criteria: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Treffer in Fundreihenfolge für gestreamte Antworten: jedes Paket wird geliefert,
+        sobald es bestätigt ist. Ohne Sortierung und ohne SearchResultCache, daher wird
+        weder die Trefferliste noch die Zellen aller Pakete vorab aufgebaut.
+        """
+        snapshot = snapshot or self.snapshot
+        criteria, canonical = self._criteria(search_criteria, snapshot, min_criteria)
+        if canonical is None:
+            return
+        for package_number, match in self._iter_matches(canonical, veredelung_required, min_criteria, snapshot):
+            yield self._package_info(package_number, match, criteria, min_criteria is not None)
+    
+    def search_page(self, search_criteria: List[Dict], veredelung_required: Optional[List[str]] = None,
+                    snapshot: Optional[DataSnapshot] = None, page: Optional[PageRequest] = None,
+                    memo: Optional[Dict] = None,
+                    min_criteria: Optional[int] = None) -> Tuple[Iterator[Dict], int, Optional[str]]:
+        """
+        Sortierte Seite der Treffer (siehe ranking.PageRequest).
         
-        # Alle Pakete sammeln, die mindestens ein Suchkriterium erfüllen
-        all_matching_packages = {}
+        Args:
+            min_criteria: Teiltreffer zulassen, die mindestens so viele Kriterien erfüllen
+                (None = alle Kriterien müssen erfüllt sein)
         
-        # Paketnummern aus der ersten Zeile von Lager_neu extrahieren
-        if len(self.lager_data) < 1:
-            return []
+        Returns:
+            (Pakete der Seite, einzeln erzeugt; Gesamtzahl der Treffer; Cursor der Folgeseite oder None)
+        """
+        snapshot = snapshot or self.snapshot
+        page = page or PageRequest()
+        criteria, matches = self._find_matches(search_criteria, veredelung_required, snapshot, memo, min_criteria)
+        if not matches:
+            return iter(()), 0, None
+        
+        package_numbers, next_cursor = page.select(matches, [(produkt, farbe.lower()) for produkt, farbe in criteria])
+        packages = (self._package_info(package_number, matches[package_number], criteria, min_criteria is not None)
+                    for package_number in package_numbers)
+        return packages, len(matches), next_cursor
+    
+    def find_matching_packages_batch(self, queries: List[Dict], snapshot: Optional[DataSnapshot] = None) -> List[Dict]:
+        """
+        Wertet mehrere Suchen gegen denselben Datenstand aus. Pakete pro Kriterium und
+        Veredelungen pro Paket werden dabei nur einmal für alle Suchen ermittelt.
+        
+        Args:
+            queries: Liste von Dictionaries mit 'id', 'search_criteria', 'veredelung_required'
+                und optional 'page' (PageRequest) und 'min_criteria' (Teiltreffer)
+            snapshot: Datenstand, gegen den gesucht wird (Standard: aktueller Stand)
+        
+        Returns:
+            Pro Suche {'id', 'packages', 'gesamt', 'next_cursor', 'dauer_ms'} in der Reihenfolge der Anfrage
+        """
+        snapshot = snapshot or self.snapshot
+        memo = {}
+        results = []
+        for query in queries:
+            started = time.perf_counter()
+            packages, total, next_cursor = self.search_page(query.get('search_criteria', []),
+                                                            query.get('veredelung_required'), snapshot,
+                                                            query.get('page'), memo, query.get('min_criteria'))
+            results.append({
+                'id': query.get('id'),
+                'packages': list(packages),
+                'gesamt': total,
+                'next_cursor': next_cursor,
+                'dauer_ms': round((time.perf_counter() - started) * 1000, 3)
+            })
+        return results
+    
+    def _find_matches(self, search_criteria: List[Dict], veredelung_required: Optional[List[str]],
+                      snapshot: DataSnapshot, memo: Optional[Dict] = None,
+                      min_criteria: Optional[int] = None) -> Tuple[List[Tuple[str, str]], Dict[str, Dict]]:
+        """Getrimmte Kriterien und alle Treffer (aus dem SearchResultCache oder neu berechnet)."""
+        criteria, canonical = self._criteria(search_criteria, snapshot, min_criteria)
+        if canonical is None:
+            return criteria, {}
         
-        package_numbers = self.lager_data[0][2:]  # Ab Spalte 2 (nach "Nummer")
+        cache_key = (canonical, tuple(sorted(set(veredelung_required or []))), min_criteria)
         
-        # Für jedes Suchkriterium Pakete finden
-        for criterion in search_criteria:
-            gewünschtes_produkt = criterion.get('product', '').strip()
-            gewünschte_farbe = criterion.get('color', '').strip()
+        matches = self.result_cache.get(snapshot.version, cache_key)
+        if matches is None:
+            matches = dict(self._iter_matches(canonical, veredelung_required, min_criteria, snapshot, memo))
+            cells = sum(len(found) for match in matches.values() for found in match['cells'].values())
+            self.result_cache.put(snapshot.version, cache_key, matches, cells)
+        return criteria, matches
+    
+    def _criteria(self, search_criteria: List[Dict], snapshot: DataSnapshot,
+                  min_criteria: Optional[int]) -> Tuple[List[Tuple[str, str]], Optional[Tuple[Tuple[str, str], ...]]]:
+        """Getrimmte Kriterien und ihre normalisierte Form (None, wenn kein Paket passen kann)."""
+        if not snapshot.lager_data or not snapshot.monday_data or not search_criteria:
+            return [], None
+        
+        criteria = [(criterion.get('product', '').strip(), criterion.get('color', '').strip())
+                    for criterion in search_criteria]
+        
+        # Ein Kriterium ohne Produkt kann von keinem Paket erfüllt werden
+        if min_criteria is None and any(not gewünschtes_produkt for gewünschtes_produkt, _ in criteria):
+            return criteria, None
+        
+        # Normalisiert (auch als Cache-Schlüssel): Reihenfolge egal, Farben ohne Groß-/Kleinschreibung
+        # (der Farbvergleich ignoriert sie ohnehin), Produkte exakt
+        return criteria, tuple(sorted({(produkt, farbe.lower()) for produkt, farbe in criteria}))
+    
+    def _iter_matches(self, criteria: Tuple[Tuple[str, str], ...], veredelung_required: Optional[List[str]],
+                      min_criteria: Optional[int], snapshot: DataSnapshot,
+                      memo: Optional[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+        """Treffer der Engine des Datenstands, vollständig oder als Teiltreffer."""
+        if min_criteria is None:
+            if snapshot.matrix is not None:
+                return snapshot.matrix.iter_match(criteria, veredelung_required, memo)
+            return self._iter_match_packages(criteria, veredelung_required, snapshot, memo)
+        if snapshot.matrix is not None:
+            return snapshot.matrix.iter_match_partial(criteria, veredelung_required, min_criteria, memo)
+        return self._iter_match_partial(criteria, veredelung_required, min_criteria, snapshot, memo)
+    
+    def _package_info(self, package_number: str, match: Dict, criteria: List[Tuple[str, str]],
+                      partial: bool = False) -> Dict:
+        monday_info = match['monday']
+        package_info = {
+            'nummer': package_number,
+            'element': monday_info.get('element', f'Probepaket {package_number}'),
+            'status': monday_info.get('status', 'Unbekannt'),
+            'lieferschein': monday_info.get('lieferschein'),
+            'produkte': []
+        }
+        
+        # Produkt-Infos je Suchkriterium in Zeilenreihenfolge hinzufügen
+        fehlend = []
+        for gewünschtes_produkt, gewünschte_farbe in criteria:
+            cells = match['cells'].get((gewünschtes_produkt, gewünschte_farbe.lower()))
+            if cells is None:
+                kriterium = {'product': gewünschtes_produkt, 'color': gewünschte_farbe}
+                if kriterium not in fehlend:
+                    fehlend.append(kriterium)
+                continue
+            for _, _, size, package_color in cells:
+                package_info['produkte'].append({
+                    'produkt': gewünschtes_produkt,
+                    'groesse': size,
+                    'farbe': package_color
+                })
+        
+        package_info['veredelungen'] = list(match['veredelungen'])
+        if partial:
+            package_info['erfuellt'] = len(match['cells'])
+            package_info['kriterien'] = len(match['cells']) + len(fehlend)
+            package_info['fehlend'] = fehlend
+        return package_info
+    
+    def _iter_match_packages(self, criteria: Tuple[Tuple[str, str], ...], veredelung_required: Optional[List[str]],
+                             snapshot: DataSnapshot, memo: Optional[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Verfügbare Pakete, die alle Kriterien und Veredelungen erfüllen, einzeln sobald bestätigt.
+        
+        Args:
+            memo: Optionaler Zwischenspeicher, den mehrere Suchen auf demselben Datenstand teilen
+        
+        Returns:
+            (Paketnummer, {'monday', 'veredelungen', 'cells': Kriterium -> passende Zellen})
+        """
+        if memo is None:
+            memo = {}
+        
+        # Schnittmenge der Pakete, die jeweils ein Suchkriterium erfüllen
+        candidates = None
+        for criterion in criteria:
+            packages = memo.get(criterion)
+            if packages is None:
+                packages = memo[criterion] = snapshot.index.packages_for(*criterion)
+            candidates = packages if candidates is None else candidates & packages
+            if not candidates:
+                return
+        
+        for package_number in candidates:
+            # Prüfen ob das Paket verfügbar ist (Status aus Monday)
+            if not snapshot.index.is_available(package_number):
+                continue
             
-            if not gewünschtes_produkt:
+            # Prüfe Veredelungsanforderungen
+            package_veredelungen = self._package_veredelungen(package_number, snapshot, memo)
+            if veredelung_required and not all(veredelung in package_veredelungen for veredelung in veredelung_required):
                 continue
             
-            # Durch alle Produktzeilen in Lager_neu iterieren
-            current_product = None
-            for row_idx, row in enumerate(self.lager_data[4:], start=4):  # Ab Zeile 4 (nach Header)
-                if not row or len(row) < 2:
-                    continue
-                    
-                product_name = row[0].strip()
-                size = row[1].strip() if len(row) > 1 else ""
-                
-                # Wenn product_name nicht leer ist, ist es ein neues Produkt
-                if product_name:
-                    current_product = product_name
-                
-                # Prüfen ob das gewünschte Produkt in dieser Zeile steht
-                if current_product == gewünschtes_produkt:
-                    # Durch alle Paketspalten iterieren (ab Spalte 2)
-                    for col_idx, color in enumerate(row[2:], start=2):
-                        if col_idx - 2 < len(package_numbers):
-                            package_number = package_numbers[col_idx - 2]
-                            
-                            # Prüfen ob die Farbe übereinstimmt
-                            if color and color.strip():
-                                package_color = color.strip()
-                                
-                                # Farbvergleich (case-insensitive und teilweise Übereinstimmung)
-                                # Wenn "Egal" gewählt wurde, akzeptiere jede Farbe
-                                if (gewünschte_farbe.lower() == 'egal' or
-                                    gewünschte_farbe.lower() in package_color.lower() or 
-                                    package_color.lower() in gewünschte_farbe.lower()):
-                                    
-                                    # Prüfen ob das Paket verfügbar ist (Status aus Monday)
-                                    monday_info = self.get_monday_info(package_number)
-                                    if monday_info and monday_info.get('status') == 'Im Lager':
-                                        if package_number not in all_matching_packages:
-                                            all_matching_packages[package_number] = {
-                                                'nummer': package_number,
-                                                'element': monday_info.get('element', f'Probepaket {package_number}'),
-                                                'status': monday_info.get('status', 'Unbekannt'),
-                                                'lieferschein': monday_info.get('lieferschein'),
-                                                'produkte': []
-                                            }
-                                        
-                                        # Produkt-Info hinzufügen
-                                        product_info = {
-                                            'produkt': current_product,
-                                            'groesse': size,
-                                            'farbe': package_color
-                                        }
-                                        all_matching_packages[package_number]['produkte'].append(product_info)
-        
-        # Nur Pakete zurückgeben, die ALLE spezifischen Suchkriterien erfüllen
-        final_matching_packages = []
-        for package_number, package_info in all_matching_packages.items():
-            # Prüfe ob das Paket ALLE Suchkriterien erfüllt
-            criteria_fulfilled = 0
-            for criterion in search_criteria:
-                gewünschtes_produkt = criterion.get('product', '').strip()
-                gewünschte_farbe = criterion.get('color', '').strip()
-                
-                # Suche in den Produkten des Pakets nach dieser spezifischen Kombination
-                found_match = False
-                for produkt in package_info['produkte']:
-                    if (produkt['produkt'] == gewünschtes_produkt and 
-                        (gewünschte_farbe.lower() == 'egal' or
-                         gewünschte_farbe.lower() in produkt['farbe'].lower() or 
-                         produkt['farbe'].lower() in gewünschte_farbe.lower())):
-                        found_match = True
-                        break
-                
-                if found_match:
-                    criteria_fulfilled += 1
+            yield package_number, {
+                'monday': snapshot.index.monday_records[package_number],
+                'veredelungen': tuple(package_veredelungen),
+                'cells': {criterion: snapshot.index.matching_cells(criterion[0], criterion[1], package_number)
+                          for criterion in criteria}
+            }
+    
+    def _iter_match_partial(self, criteria: Tuple[Tuple[str, str], ...], veredelung_required: Optional[List[str]],
+                            min_criteria: int, snapshot: DataSnapshot,
+                            memo: Optional[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Verfügbare Pakete, die mindestens min_criteria der Kriterien und alle Veredelungen erfüllen.
+        Die erfüllten Kriterien pro Paket werden in einem Durchlauf über die Paketmengen je
+        Kriterium gezählt, statt für jede Teilmenge der Kriterien erneut zu suchen.
+        
+        Returns:
+            Wie _iter_match_packages, 'cells' enthält nur die erfüllten Kriterien
+        """
+        if memo is None:
+            memo = {}
+        
+        erfuellt: Dict[str, List[Tuple[str, str]]] = {}
+        for criterion in criteria:
+            packages = memo.get(criterion)
+            if packages is None:
+                packages = memo[criterion] = snapshot.index.packages_for(*criterion)
+            for package_number in packages:
+                erfuellt.setdefault(package_number, []).append(criterion)
+        
+        for package_number, package_criteria in erfuellt.items():
+            if len(package_criteria) < min_criteria or not snapshot.index.is_available(package_number):
+                continue
+            package_veredelungen = self._package_veredelungen(package_number, snapshot, memo)
+            if veredelung_required and not all(veredelung in package_veredelungen for veredelung in veredelung_required):
+                continue
             
-            # Nur Pakete hinzufügen, die ALLE Suchkriterien erfüllen
-            if criteria_fulfilled == len(search_criteria):
-                # Prüfe Veredelungsanforderungen
-                if veredelung_required:
-                    package_veredelungen = self.get_veredelung_info(package_number)
-                    # Prüfe ob alle gewünschten Veredelungen vorhanden sind
-                    veredelung_match = all(veredelung in package_veredelungen for veredelung in veredelung_required)
-                    if veredelung_match:
-                        package_info['veredelungen'] = package_veredelungen
-                        final_matching_packages.append(package_info)
-                else:
-                    # Keine Veredelungsanforderungen, füge Paket hinzu
-                    package_info['veredelungen'] = self.get_veredelung_info(package_number)
-                    final_matching_packages.append(package_info)
-        
-        return final_matching_packages
-    
-    def get_veredelung_info(self, package_number: str) -> List[str]:
+            yield package_number, {
+                'monday': snapshot.index.monday_records[package_number],
+                'veredelungen': tuple(package_veredelungen),
+                'cells': {criterion: snapshot.index.matching_cells(criterion[0], criterion[1], package_number)
+                          for criterion in package_criteria}
+            }
+    
+    def _package_veredelungen(self, package_number: str, snapshot: DataSnapshot, memo: Dict) -> List[str]:
+        package_veredelungen = memo.get(package_number)
+        if package_veredelungen is None:
+            package_veredelungen = memo[package_number] = self.get_veredelung_info(package_number, snapshot)
+        return package_veredelungen
+    
+    def get_veredelung_info(self, package_number: str, snapshot: Optional[DataSnapshot] = None) -> List[str]:
         """Holt Veredelungsinformationen für ein Paket aus Lager_neu."""
-        if not self.lager_data or len(self.lager_data) < 181:
+        snapshot = snapshot or self.snapshot
+        if not snapshot.lager_data or len(snapshot.lager_data) < 181:
             return []
         
-        # Paketnummern aus der ersten Zeile extrahieren
-        package_numbers = self.lager_data[0][2:]
-        
-        # Finde die Spalte für dieses Paket
-        package_col_idx = None
-        for i, pkg_num in enumerate(package_numbers):
-            if pkg_num == package_number:
-                package_col_idx = i + 2  # +2 weil die Paketnummern ab Spalte 2 stehen
-                break
-        
+        # Spalte für dieses Paket aus dem Index
+        package_col_idx = snapshot.index.package_columns.get(package_number)
         if package_col_idx is None:
             return []
         
         veredelungen = []
         
         # Prüfe Siebdruck (Zeile 179)
-        if len(self.lager_data) > 179 and len(self.lager_data[179]) > package_col_idx:
-            if self.lager_data[179][package_col_idx] == '1':
+        if len(snapshot.lager_data) > 179 and len(snapshot.lager_data[179]) > package_col_idx:
+            if snapshot.lager_data[179][package_col_idx] == '1':
                 veredelungen.append('Siebdruck')
         
         # Prüfe Digitaldruck (Zeile 180) 
-        if len(self.lager_data) > 180 and len(self.lager_data[180]) > package_col_idx:
-            if self.lager_data[180][package_col_idx] == '1':
+        if len(snapshot.lager_data) > 180 and len(snapshot.lager_data[180]) > package_col_idx:
+            if snapshot.lager_data[180][package_col_idx] == '1':
                 veredelungen.append('Digitaldruck')
         
         # Prüfe Stick (Zeile 181)
-        if len(self.lager_data) > 181 and len(self.lager_data[181]) > package_col_idx:
-            if self.lager_data[181][package_col_idx] == '1':
+        if len(snapshot.lager_data) > 181 and len(snapshot.lager_data[181]) > package_col_idx:
+            if snapshot.lager_data[181][package_col_idx] == '1':
                 veredelungen.append('Stick')
         
         return veredelungen
     
-    def get_monday_info(self, package_number: str) -> Optional[Dict]:
+    def get_monday_info(self, package_number: str, snapshot: Optional[DataSnapshot] = None) -> Optional[Dict]:
         """Holt Informationen über ein Paket aus der Monday Tabelle."""
-        if not self.monday_data:
+        snapshot = snapshot or self.snapshot
+        if not snapshot.monday_data:
             return None
-            
-        for row in self.monday_data[1:]:  # Ab Zeile 1 (nach Header)
-            if not row or len(row) < 1:
-                continue
-                
-            element = row[0]
-            if element and f"Probepaket {package_number}" in element:
-                return {
-                    'element': element,
-                    'status': row[2] if len(row) > 2 else 'Unbekannt',
-                    'lieferschein': row[3] if len(row) > 3 else None
-                }
         
-        return None
+        record = snapshot.index.monday_records.get(package_number)
+        return dict(record) if record else None
 
 # Globale Instanz des Finders
 SPREADSHEET_ID = os.getenv('SPREADSHEET_ID', "191RsU9uDyRQDIM4UITTY2F8KxalA9uGP497pdWKoRvA")
+# Längste Wartezeit der Hintergrund-Aktualisierung (Sekunden, 0 deaktiviert); Standard ist die kürzeste TTL.
+# Geweckt wird, sobald der nächste Bereich fällig ist, plus Jitter nach oben
+REFRESH_INTERVAL_SECONDS = float(os.getenv('REFRESH_INTERVAL_SECONDS') or RefreshSchedule(SHEET_TTLS).min_ttl())
+REFRESH_JITTER_SECONDS = float(os.getenv('REFRESH_JITTER_SECONDS') or REFRESH_INTERVAL_SECONDS * 0.1)
+# Mindestabstand zwischen zwei angeforderten Aktualisierungen (/api/refresh)
+REFRESH_MIN_INTERVAL_SECONDS = float(os.getenv('REFRESH_MIN_INTERVAL_SECONDS', 30))
+# Letzter Datenstand auf der Platte für schnelle Kaltstarts (leer deaktiviert)
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'snapshot.bin'))
 finder = None
+_finder_lock = threading.Lock()
+
+def reload_finder(reason: str = 'manual'):
+    """
+    Lädt die Daten neu; der neue Datenstand wird erst bei Erfolg veröffentlicht.
+    Periodische Durchläufe laden nur die fälligen Bereiche, alle anderen alles.
+    """
+    current = get_finder()
+    loaded = current.refresh_due() if reason == 'scheduled' else current.load_data()
+    if not loaded:
+        raise RuntimeError("Daten konnten nicht aus Google Sheets geladen werden")
+
+def _refresh_due_in() -> Optional[float]:
+    """Sekunden bis zum nächsten fälligen Bereich des Finders (None, solange keiner existiert)."""
+    return finder.schedule.seconds_until_due() if finder is not None else None
+
+refresher = BackgroundRefresher(reload_finder, interval=REFRESH_INTERVAL_SECONDS, jitter=REFRESH_JITTER_SECONDS,
+                                min_interval=REFRESH_MIN_INTERVAL_SECONDS, due_in=_refresh_due_in)
 
 def get_finder():
-    """Singleton Pattern für den Finder."""
+    """Singleton Pattern für den Finder (thread-sicher initialisiert)."""
     global finder
-    print(f"🔍 DEBUG: get_finder aufgerufen, finder ist None: {finder is None}")
-    if finder is None:
-        print(f"🔍 DEBUG: Erstelle neuen ProbepaketFinder mit Spreadsheet ID: {SPREADSHEET_ID}")
-        try:
-            finder = ProbepaketFinder(SPREADSHEET_ID)
-            print("🔍 DEBUG: ProbepaketFinder erfolgreich erstellt")
-            print("🔍 DEBUG: Starte load_data...")
-            finder.load_data()
-            print("🔍 DEBUG: load_data abgeschlossen")
-        except Exception as e:
-            print(f"❌ DEBUG: Fehler beim Erstellen des Finders: {e}")
-            import traceback
-            print(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
-            raise
-    else:
-        print("🔍 DEBUG: Verwende existierenden Finder")
+    if finder is not None:
+        return finder
+    
+    with _finder_lock:
+        if finder is None:
+            logger.info("Erstelle ProbepaketFinder", extra={'spreadsheet_id': SPREADSHEET_ID})
+            try:
+                load_started = time.perf_counter()
+                new_finder = ProbepaketFinder(SPREADSHEET_ID, snapshot_path=SNAPSHOT_PATH)
+                # Mit gespeichertem Datenstand sofort antworten und im Hintergrund neu laden
+                restored = new_finder.restore_snapshot()
+                # Ohne Datenstand keine leeren Erfolgsantworten liefern, sondern den Fehler melden
+                if not restored and not new_finder.load_data():
+                    raise RuntimeError(str(new_finder.last_error or 'Tabellenblätter konnten nicht geladen werden'))
+                load_ms = (time.perf_counter() - load_started) * 1000
+            except Exception:
+                logger.exception("Fehler beim Erstellen des Finders")
+                raise
+            # Authentifizierung und Client-Aufbau getrennt vom eigentlichen Laden ausweisen
+            client_timings = dict(new_finder._client.timings) if new_finder._client is not None else {}
+            for phase, duration_ms in client_timings.items():
+                startup.add(phase, duration_ms)
+            startup.add('snapshot' if restored else 'first_load', load_ms - sum(client_timings.values()))
+            # Erst nach dem ersten Ladevorgang für andere Threads sichtbar machen
+            finder = new_finder
+            startup.finish()
+            # Weitere Aktualisierungen laufen im Hintergrund
+            refresher.start()
+            if restored:
+                refresher.trigger('startup')
     return finder
 
 @app.route('/')
@@ -433,13 +755,20 @@ def debug():
     # Versuche Finder zu erstellen
     try:
         finder = get_finder()
+        snapshot = finder.snapshot
         debug_info.append(f"✅ Finder erfolgreich erstellt")
-        debug_info.append(f"🔍 Farben Daten: {len(finder.farben_data) if finder.farben_data else 0} Zeilen")
-        debug_info.append(f"🔍 Monday Daten: {len(finder.monday_data) if finder.monday_data else 0} Zeilen")
-        debug_info.append(f"🔍 Lager_neu Daten: {len(finder.lager_data) if finder.lager_data else 0} Zeilen")
+        debug_info.append(f"🔍 Datenstand: Version {snapshot.version} vom {snapshot.last_update}")
+        debug_info.append(f"🔍 Farben Daten: {len(snapshot.farben_data)} Zeilen")
+        debug_info.append(f"🔍 Monday Daten: {len(snapshot.monday_data)} Zeilen")
+        debug_info.append(f"🔍 Lager_neu Daten: {len(snapshot.lager_data)} Zeilen")
+        if snapshot.load_stats:
+            debug_info.append(f"🔍 Letzter Ladevorgang: {snapshot.load_stats['dauer_ms']} ms, {snapshot.load_stats['bytes']} Bytes")
+        debug_info.append(f"🔍 Suchergebnis-Cache: {finder.result_cache.stats()}")
+        debug_info.append(f"🔍 Such-Engine: {finder.engine}")
+        debug_info.append(f"🔍 Start: {startup.as_dict()}")
         
         # Teste Produkte laden
-        products = finder.get_available_products()
+        products = finder.get_available_products(snapshot)
         debug_info.append(f"✅ Produkte geladen: {len(products)}")
         debug_info.append(f"🔍 Produkte: {products}")
         
@@ -499,27 +828,30 @@ def debug():
 
 @app.route('/api/products')
 def get_products():
-    """API Endpoint für verfügbare Produkte."""
+    """
+    API Endpoint für verfügbare Produkte.
+    
+    Das ETag hängt nur vom Inhalt von Farben ab; Stand und Zeitpunkt der letzten
+    Aktualisierung kommen daher als Header (X-Data-Version, X-Last-Update), auch bei 304.
+    """
     try:
-        print("🔍 DEBUG: /api/products aufgerufen")
         finder = get_finder()
-        print(f"🔍 DEBUG: Finder erstellt: {finder is not None}")
-        print(f"🔍 DEBUG: Farben Daten verfügbar: {finder.farben_data is not None}")
-        print(f"🔍 DEBUG: Farben Daten Länge: {len(finder.farben_data) if finder.farben_data else 0}")
+        snapshot = finder.snapshot
         
-        products = finder.get_available_products()
-        print(f"🔍 DEBUG: Produkte gefunden: {len(products)}")
-        print(f"🔍 DEBUG: Produkte: {products}")
+        def build_payload():
+            products = finder.get_available_products(snapshot)
+            logger.debug("/api/products: %d Produkte (Version %d)", len(products), snapshot.version)
+            return {
+                'success': True,
+                'products': products
+            }
         
-        return jsonify({
-            'success': True,
-            'products': products,
-            'last_update': finder.last_update.isoformat() if finder.last_update else None
+        return cached_json(snapshot.catalog_tag, 'products', build_payload, CACHE_CONTROL['products'], headers={
+            'X-Data-Version': str(snapshot.version),
+            'X-Last-Update': snapshot.last_update.isoformat() if snapshot.last_update else ''
         })
     except Exception as e:
-        print(f"❌ DEBUG: Fehler in /api/products: {e}")
-        import traceback
-        print(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
+        logger.exception("Fehler in /api/products")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -530,49 +862,183 @@ def get_colors(product):
     """API Endpoint für verfügbare Farben eines Produkts."""
     try:
         finder = get_finder()
-        colors = finder.get_available_colors(product)
-        return jsonify({
+        snapshot = finder.snapshot
+        return cached_json(snapshot.catalog_tag, f'colors:{product}', lambda: {
             'success': True,
-            'colors': colors
-        })
+            'colors': finder.get_available_colors(product, snapshot)
+        }, CACHE_CONTROL['colors'])
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+def parse_search_request(data: Dict) -> Tuple[List[Dict], List[str]]:
+    """Suchkriterien und Veredelungsanforderungen aus einem Request-Body."""
+    # Unterstütze sowohl alte (einzelne) als auch neue (mehrere) Suchkriterien
+    if 'search_criteria' in data:
+        # Neue Format: Liste von Suchkriterien
+        search_criteria = data.get('search_criteria', [])
+    else:
+        # Alte Format: Einzelne Produkt/Farbe für Rückwärtskompatibilität
+        product = data.get('product', '')
+        color = data.get('color', '')
+        if product and color:
+            search_criteria = [{'product': product, 'color': color}]
+        else:
+            search_criteria = []
+    
+    # Veredelungsanforderungen extrahieren
+    veredelung_required = data.get('veredelung_required', [])
+    return search_criteria, veredelung_required
+
+def parse_min_criteria(data: Dict) -> Optional[int]:
+    """
+    Teiltreffer-Modus aus einem Request-Body: 'partial': true (mindestens ein Kriterium)
+    und/oder 'min_criteria'. None, wenn alle Kriterien erfüllt sein müssen.
+    
+    Raises:
+        ValueError: bei ungültigem min_criteria
+    """
+    value = data.get('min_criteria')
+    if value is None or value == '':
+        return 1 if data.get('partial') else None
+    try:
+        min_criteria = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('min_criteria muss eine ganze Zahl sein')
+    if min_criteria < 1:
+        raise ValueError('min_criteria muss mindestens 1 sein')
+    return min_criteria
+
+def wants_stream() -> bool:
+    """Gestreamte Suche per ?stream=1 oder Accept: application/x-ndjson."""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'ndjson'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def stream_search(finder: 'ProbepaketFinder', snapshot: DataSnapshot, search_criteria: List[Dict],
+                  veredelung_required: List[str], page: Optional[PageRequest] = None,
+                  min_criteria: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Ein Paket pro Zeile; die letzte Zeile fasst die Suche zusammen ({'success', 'anzahl',
+    'gesamt', 'next_cursor', 'search_params', 'version'} bzw. {'success': False, 'error'}).
+    
+    Ohne page kommen die Pakete in Fundreihenfolge, jedes sobald es bestätigt ist
+    (iter_matching_packages). Mit Sortierung bzw. Seite müssen erst alle Treffer
+    feststehen; dann werden nur die Antwortobjekte einzeln erzeugt.
+    """
+    anzahl = 0
+    try:
+        if page is None:
+            packages = finder.iter_matching_packages(search_criteria, veredelung_required, snapshot, min_criteria)
+            total, next_cursor = None, None
+        else:
+            packages, total, next_cursor = finder.search_page(search_criteria, veredelung_required, snapshot, page,
+                                                              min_criteria=min_criteria)
+        for package_info in packages:
+            anzahl += 1
+            yield package_info
+    except Exception as e:
+        logger.exception("Gestreamte Suche abgebrochen")
+        yield {'success': False, 'error': str(e), 'anzahl': anzahl}
+        return
+    yield {
+        'success': True,
+        'anzahl': anzahl,
+        'gesamt': anzahl if total is None else total,
+        'next_cursor': next_cursor,
+        'search_params': {
+            'search_criteria': search_criteria
+        },
+        'version': snapshot.version
+    }
+
 @app.route('/api/search', methods=['POST'])
 def search_packages():
-    """API Endpoint für die Paketsuche."""
+    """API Endpoint für die Paketsuche (optional sortiert und seitenweise, siehe ranking.py, oder mit Teiltreffern)."""
     try:
         data = request.get_json()
-        
-        # Unterstütze sowohl alte (einzelne) als auch neue (mehrere) Suchkriterien
-        if 'search_criteria' in data:
-            # Neue Format: Liste von Suchkriterien
-            search_criteria = data.get('search_criteria', [])
-        else:
-            # Alte Format: Einzelne Produkt/Farbe für Rückwärtskompatibilität
-            product = data.get('product', '')
-            color = data.get('color', '')
-            if product and color:
-                search_criteria = [{'product': product, 'color': color}]
-            else:
-                search_criteria = []
-        
-        # Veredelungsanforderungen extrahieren
-        veredelung_required = data.get('veredelung_required', [])
+        search_criteria, veredelung_required = parse_search_request(data)
+        try:
+            page = PageRequest.from_request(data)
+            min_criteria = parse_min_criteria(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         finder = get_finder()
-        packages = finder.find_matching_packages(search_criteria, veredelung_required)
+        snapshot = finder.snapshot
+        if wants_stream():
+            # Ohne Sortierung und Seite wird direkt aus der Suche gestreamt
+            ranked = any(data.get(name) not in (None, '') for name in ('sort', 'limit', 'offset', 'cursor'))
+            return ndjson_stream(stream_search(finder, snapshot, search_criteria, veredelung_required,
+                                               page if ranked else None, min_criteria),
+                                 cache_control=CACHE_CONTROL['search'])
+        packages, total, next_cursor = finder.search_page(search_criteria, veredelung_required, snapshot, page,
+                                                          min_criteria=min_criteria)
         
-        return jsonify({
+        return compressed_json({
             'success': True,
-            'packages': packages,
+            'packages': list(packages),
+            'gesamt': total,
+            'next_cursor': next_cursor,
             'search_params': {
                 'search_criteria': search_criteria
-            }
-        })
+            },
+            'version': snapshot.version
+        }, cache_control=CACHE_CONTROL['search'])
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/search/batch', methods=['POST'])
+def search_packages_batch():
+    """API Endpoint für viele Suchen in einem Aufruf (z.B. Wunschlisten aus dem Angebotstool)."""
+    try:
+        data = request.get_json()
+        raw_queries = data.get('queries', [])
+        if len(raw_queries) > MAX_BATCH_QUERIES:
+            return jsonify({
+                'success': False,
+                'error': f'Maximal {MAX_BATCH_QUERIES} Suchen pro Aufruf'
+            }), 400
+        
+        queries = []
+        for i, raw_query in enumerate(raw_queries):
+            search_criteria, veredelung_required = parse_search_request(raw_query)
+            query_id = raw_query.get('id', str(i))
+            try:
+                page = PageRequest.from_request(raw_query)
+                min_criteria = parse_min_criteria(raw_query)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': f'Suche {query_id}: {e}'
+                }), 400
+            queries.append({
+                'id': query_id,
+                'search_criteria': search_criteria,
+                'veredelung_required': veredelung_required,
+                'page': page,
+                'min_criteria': min_criteria
+            })
+        
+        started = time.perf_counter()
+        finder = get_finder()
+        snapshot = finder.snapshot
+        results = finder.find_matching_packages_batch(queries, snapshot)
+        
+        return compressed_json({
+            'success': True,
+            'results': results,
+            'dauer_ms': round((time.perf_counter() - started) * 1000, 3),
+            'version': snapshot.version
+        }, cache_control=CACHE_CONTROL['search'])
     except Exception as e:
         return jsonify({
             'success': False,
@@ -581,23 +1047,67 @@ def search_packages():
 
 @app.route('/api/refresh')
 def refresh_data():
-    """API Endpoint zum Aktualisieren der Daten."""
+    """API Endpoint zum Anstoßen einer Aktualisierung (läuft im Hintergrund)."""
     try:
-        global finder
-        finder = ProbepaketFinder(SPREADSHEET_ID)
-        finder.load_data()
+        current = get_finder()
+        job = refresher.trigger('manual')
+        
+        if not job['coalesced']:
+            message = 'Aktualisierung gestartet'
+        elif job['status'] == JOB_DONE:
+            message = 'Daten wurden gerade erst aktualisiert'
+        elif job['status'] == JOB_FAILED:
+            message = f'Letzte Aktualisierung ist gerade fehlgeschlagen, neuer Versuch frühestens nach {REFRESH_MIN_INTERVAL_SECONDS:g} s'
+        else:
+            message = 'Aktualisierung läuft bereits'
         
         return jsonify({
             'success': True,
-            'message': 'Daten erfolgreich aktualisiert',
-            'last_update': finder.last_update.isoformat()
-        })
+            'message': message,
+            'job_id': job['id'],
+            'status': job['status'],
+            'bereits_laufend': job['coalesced'],
+            'error': job['error'],
+            'version': current.snapshot.version,
+            'last_update': current.last_update.isoformat() if current.last_update else None
+        }), 200 if job['status'] in (JOB_DONE, JOB_FAILED) else 202
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/refresh/<job_id>')
+def refresh_status(job_id):
+    """API Endpoint für den Status eines Aktualisierungsauftrags."""
+    job = refresher.job_status(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unbekannter Auftrag'
+        }), 404
+    
+    current = finder
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'error': job['error'],
+        'version': current.snapshot.version if current else None,
+        'last_update': current.last_update.isoformat() if current and current.last_update else None
+    })
+
+def warm_up():
+    """Lädt die Daten beim Start im Hintergrund, während der Server bereits Anfragen annimmt."""
+    try:
+        get_finder()
+    except Exception:
+        # Bereits in get_finder geloggt; die erste Anfrage versucht es erneut
+        pass
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
-    app.run(debug=False, host='0.0.0.0', port=port)
+    if os.getenv('STARTUP_WARMUP', '1') != '0':
+        threading.Thread(target=warm_up, name='startup-warmup', daemon=True).start()
+    # Datenstände sind unveränderlich, daher können Anfragen parallel bedient werden
+    app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark der Such- und Katalogpfade auf synthetischen Daten.
+
+Aufruf:
+    python benchmark.py --scale small --scale 2000x1000 --iterations 200 --output benchmark_results.json
+    python benchmark.py --scale small --compare benchmark_results.json
+
+Pro Größe (Paketspalten × Produktzeilen, siehe synthetic_data.SCALES) werden
+gemessen: Aufbau des Datenstands, find_matching_packages (ohne und mit
+Ergebnis-Cache), get_available_products, get_available_colors,
+get_veredelung_info sowie die Endpoints /api/products, /api/colors/<produkt>,
+/api/search und /api/search/batch. Ergebnis sind Latenz-Perzentile in ms und
+der Spitzenverbrauch an Speicher (tracemalloc, eigener Durchlauf) pro Messung,
+ausgegeben als Tabelle und als JSON-Datei.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Benchmarks laufen ohne Sheets-Zugriff, Hintergrund-Aktualisierung und Snapshot-Datei
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('SNAPSHOT_PATH', '')
+os.environ.setdefault('STARTUP_BUDGET_MS', '0')
+
+import app as webapp
+from latency_stats import summarize
+from result_cache import SearchResultCache
+from snapshot import DataSnapshot
+from synthetic_data import generate_queries, generate_sheets, package_numbers, parse_scale
+
+# Anzahl Durchläufe für die Speichermessung (tracemalloc verlangsamt stark)
+MEMORY_ITERATIONS = 20
+# Suchen pro Aufruf von /api/search/batch
+BATCH_SIZE = 20
+
+
+def measure(fn: Callable, args: Sequence[tuple], iterations: int) -> Dict:
+    """Latenz-Perzentile und Spitzenspeicher von fn über die Argumentliste (zyklisch)."""
+    timings = []
+    for i in range(iterations):
+        call_args = args[i % len(args)]
+        started = time.perf_counter()
+        fn(*call_args)
+        timings.append((time.perf_counter() - started) * 1000)
+    result = summarize(timings)
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for i in range(min(iterations, MEMORY_ITERATIONS)):
+            fn(*args[i % len(args)])
+        result['peak_kib'] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1024, 1)
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run_scale(packages: int, product_rows: int, iterations: int, engine: str, seed: int) -> Dict:
+    """Alle Messungen für eine Datengröße."""
+    started = time.perf_counter()
+    sheets = generate_sheets(packages, product_rows, seed=seed)
+    generate_ms = (time.perf_counter() - started) * 1000
+    queries = generate_queries(sheets, count=max(iterations, BATCH_SIZE), seed=seed + 1)
+    numbers = package_numbers(sheets, count=200, seed=seed + 2)
+
+    finder = webapp.ProbepaketFinder('benchmark', service=object(), engine=engine)
+    results: Dict[str, Dict] = {}
+
+    def build():
+        return DataSnapshot.build(1, sheets['Farben'], sheets['monday'], sheets['Lager_neu'],
+                                  engine=engine, color_synonyms=webapp.COLOR_SYNONYMS)
+    results['snapshot_build'] = measure(build, [()], max(1, min(3, iterations)))
+
+    finder.store.publish(sheets['Farben'], sheets['monday'], sheets['Lager_neu'])
+    snapshot = finder.snapshot
+    products = finder.get_available_products(snapshot)
+    search_args = [(query['search_criteria'], query['veredelung_required'], snapshot) for query in queries]
+
+    # Ohne Ergebnis-Cache: reine Suchkosten
+    max_entries = finder.result_cache.max_entries
+    finder.result_cache.max_entries = 0
+    results['find_matching_packages'] = measure(finder.find_matching_packages, search_args, iterations)
+    finder.result_cache.max_entries = max_entries
+    for call_args in search_args:
+        finder.find_matching_packages(*call_args)
+    results['find_matching_packages (cache)'] = measure(finder.find_matching_packages, search_args, iterations)
+
+    results['get_available_products'] = measure(finder.get_available_products, [(snapshot,)], iterations)
+    results['get_available_colors'] = measure(finder.get_available_colors,
+                                              [(product, snapshot) for product in products], iterations)
+    results['get_veredelung_info'] = measure(finder.get_veredelung_info,
+                                             [(number, snapshot) for number in numbers], iterations)
+
+    # Endpoints über den Flask Test-Client, ohne Netzwerk
+    webapp.finder = finder
+    client = webapp.app.test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+
+    def get(path):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+
+    def post(path, body):
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+
+    results['GET /api/products'] = measure(get, [('/api/products',)], iterations)
+    results['GET /api/colors/<produkt>'] = measure(get, [(f'/api/colors/{product}',) for product in products],
+                                                   iterations)
+    # Eigener, abgeschalteter Cache: die Einträge aus den Messungen oben würden sonst weiter getroffen
+    warm_cache = finder.result_cache
+    finder.result_cache = SearchResultCache(max_entries=0)
+    results['POST /api/search'] = measure(post, [('/api/search', query) for query in queries], iterations)
+    batches = [('/api/search/batch', {'queries': [dict(query, id=str(j)) for j, query in
+                                                  enumerate(queries[i:i + BATCH_SIZE])]})
+               for i in range(0, len(queries) - BATCH_SIZE + 1, BATCH_SIZE)]
+    results['POST /api/search/batch'] = measure(post, batches, max(1, iterations // BATCH_SIZE))
+    finder.result_cache = warm_cache
+    webapp.finder = None
+
+    return {
+        'pakete': packages,
+        'produktzeilen': product_rows,
+        'zellen': sum(1 for row in sheets['Lager_neu'][4:] for cell in row[2:] if cell),
+        'daten_erzeugen_ms': round(generate_ms, 1),
+        'messungen': results
+    }
+
+
+def print_table(scale_result: Dict, previous: Optional[Dict] = None):
+    print(f"\n{scale_result['pakete']} Pakete × {scale_result['produktzeilen']} Produktzeilen "
+          f"({scale_result['zellen']} gefüllte Zellen)")
+    print(f"{'Messung':34} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'Peak KiB':>10}"
+          + (f" {'p50 alt':>10} {'Faktor':>7}" if previous else ''))
+    for name, stats in scale_result['messungen'].items():
+        line = (f"{name:34} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f} "
+                f"{stats['peak_kib']:>10.1f}")
+        old = (previous or {}).get('messungen', {}).get(name)
+        if old:
+            factor = old['p50_ms'] / stats['p50_ms'] if stats['p50_ms'] else float('inf')
+            line += f" {old['p50_ms']:>10.3f} {factor:>6.2f}x"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark der Suche auf synthetischen Daten')
+    parser.add_argument('--scale', action='append',
+                        help="'small', 'medium', 'large' oder PAKETExZEILEN, mehrfach möglich (Standard: small, medium)")
+    parser.add_argument('--iterations', type=int, default=200, help='Aufrufe pro Messung')
+    parser.add_argument('--engine', default=webapp.SEARCH_ENGINE, choices=webapp.SEARCH_ENGINES)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON-Datei für die Ergebnisse')
+    parser.add_argument('--compare', help='Frühere Ergebnisdatei, deren p50 mit ausgegeben wird')
+    args = parser.parse_args(argv)
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = {(r['pakete'], r['produktzeilen']): r for r in json.load(f)['ergebnisse']}
+
+    report = {
+        'erstellt': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'plattform': platform.platform(),
+        'engine': args.engine,
+        'iterationen': args.iterations,
+        'seed': args.seed,
+        'ergebnisse': []
+    }
+    for scale in args.scale or ['small', 'medium']:
+        packages, product_rows = parse_scale(scale)
+        scale_result = run_scale(packages, product_rows, args.iterations, args.engine, args.seed)
+        report['ergebnisse'].append(scale_result)
+        print_table(scale_result, previous.get((packages, product_rows)))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nErgebnisse geschrieben: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
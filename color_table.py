@@ -0,0 +1,83 @@
+"""
+Vorberechnete Farbverträglichkeit für die Suche.
+
+Jede vorkommende Zellfarbe wird einmal normalisiert (getrimmt, klein
+geschrieben). Für jeden Farbwunsch wird einmal die Menge der passenden
+Zellfarben berechnet, nach der Regel in color_matches ("Egal" passt
+immer, sonst Teilstring in eine der beiden Richtungen), erweitert um
+konfigurierbare Synonyme (z.B. "Rot" = "Red"). Die Suche prüft danach nur noch
+die Mitgliedschaft der Zellfarbe in dieser Menge.
+"""
+
+import json
+import os
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+# Obergrenze für zwischengespeicherte Farbwünsche (freie Eingaben über die API)
+MAX_WISHES = 4096
+
+
+def canonical_color(color: str) -> str:
+    """Normalisierte Form einer Farbe für den Vergleich."""
+    return color.strip().lower()
+
+
+def color_matches(gewünschte_farbe: str, package_color: str) -> bool:
+    """Farbvergleich (case-insensitive und teilweise Übereinstimmung, "Egal" passt immer)."""
+    wunsch = gewünschte_farbe.lower()
+    farbe = package_color.lower()
+    return wunsch == 'egal' or wunsch in farbe or farbe in wunsch
+
+
+def load_color_synonyms(config_path: Optional[str] = None) -> List[List[str]]:
+    """
+    Synonymgruppen aus der JSON-Konfiguration ({"farb_synonyme": [["Rot", "Red"], ...]}).
+
+    Farben einer Gruppe gelten als gleichwertige Farbwünsche. Ohne Datei gibt es
+    keine Synonyme.
+    """
+    if not config_path or not os.path.exists(config_path):
+        return []
+    with open(config_path, encoding='utf-8') as f:
+        return [list(group) for group in json.load(f).get('farb_synonyme', [])]
+
+
+class ColorTable:
+    """Farbwunsch -> Menge der passenden Zellfarben (in ihrer Schreibweise im Lager)."""
+
+    def __init__(self, cell_colors: Iterable[str], synonyms: Sequence[Sequence[str]] = ()):
+        """
+        Args:
+            cell_colors: Alle vorkommenden Zellfarben (getrimmt)
+            synonyms: Gruppen gleichwertiger Farbwünsche
+        """
+        # Zellfarbe -> normalisierte Form (einmal pro eindeutiger Farbe)
+        self._canonical: Dict[str, str] = {color: canonical_color(color) for color in dict.fromkeys(cell_colors)}
+        # Normalisierter Wunsch -> weitere gleichwertige Wünsche
+        self._synonyms: Dict[str, Tuple[str, ...]] = {}
+        for group in synonyms:
+            terms = list(dict.fromkeys(canonical_color(term) for term in group if term and term.strip()))
+            for term in terms:
+                others = tuple(other for other in terms if other != term)
+                self._synonyms[term] = tuple(dict.fromkeys(self._synonyms.get(term, ()) + others))
+        self._table: Dict[str, FrozenSet[str]] = {}
+
+    def warm(self, wishes: Iterable[str]):
+        """Berechnet die Einträge für bekannte Farbwünsche (z.B. aus dem Katalog) vorab."""
+        for wish in wishes:
+            self.compatible(wish)
+
+    def compatible(self, wish: str) -> FrozenSet[str]:
+        """Zellfarben, die zum Farbwunsch passen."""
+        key = canonical_color(wish)
+        result = self._table.get(key)
+        if result is None:
+            result = self._compute(key)
+            if len(self._table) < MAX_WISHES:
+                self._table[key] = result
+        return result
+
+    def _compute(self, key: str) -> FrozenSet[str]:
+        terms = (key,) + self._synonyms.get(key, ())
+        return frozenset(color for color, canonical in self._canonical.items()
+                         if any(color_matches(term, canonical) for term in terms))
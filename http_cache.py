@@ -0,0 +1,204 @@
+"""
+HTTP-Caching und Kompression für JSON-Antworten.
+
+ETags werden aus einer Kennung der zugrunde liegenden Daten (z.B.
+DataSnapshot.catalog_tag) und einem Schlüssel für den Endpoint abgeleitet; schickt der Browser das ETag per If-None-Match zurück,
+wird mit 304 geantwortet. Serialisierte und komprimierte Antworten werden pro
+Datenstand zwischengespeichert, damit unveränderte Kataloge nicht bei jeder
+Anfrage neu serialisiert werden.
+"""
+
+import gzip
+import hashlib
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import Response, current_app, request, stream_with_context
+
+try:
+    import brotli
+except ImportError:  # optional, ohne brotli wird nur gzip angeboten
+    brotli = None
+
+# Kleinere Antworten werden nicht komprimiert
+MIN_COMPRESS_BYTES = 512
+# Maximale Anzahl zwischengespeicherter Antwortkörper
+MAX_CACHED_BODIES = 1024
+
+
+def _qualities(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding Header -> Kodierung (klein geschrieben) -> q-Wert."""
+    qualities = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name.strip():
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip().lower()] = q
+    return qualities
+
+
+def _quality(qualities: Dict[str, float], encoding: str) -> float:
+    return qualities.get(encoding, qualities.get('*', 0.0))
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Wählt 'br' oder 'gzip' anhand des Accept-Encoding Headers (None = unkomprimiert)."""
+    qualities = _qualities(accept_encoding)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = None
+    for encoding in candidates:
+        q = _quality(qualities, encoding)
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True, wenn der Client gzip akzeptiert (q > 0), unabhängig von anderen Kodierungen."""
+    return _quality(_qualities(accept_encoding), 'gzip') > 0
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class ResponseCache:
+    """Serialisierte (und komprimierte) JSON-Körper, gültig für genau einen Datenstand."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_BODIES):
+        self.max_entries = max_entries
+        self._data_tag = None
+        self._bodies: Dict[Tuple[str, Optional[str]], bytes] = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, data_tag: str, key: str, encoding: Optional[str],
+                     build_body: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            if data_tag != self._data_tag:
+                # Neuer Datenstand: alle alten Antworten verwerfen
+                self._data_tag = data_tag
+                self._bodies = {}
+            body = self._bodies.get((key, encoding))
+        if body is not None:
+            return body
+
+        body = compress(build_body(), encoding)
+        with self._lock:
+            if data_tag == self._data_tag and len(self._bodies) < self.max_entries:
+                self._bodies[(key, encoding)] = body
+        return body
+
+
+_response_cache = ResponseCache()
+
+
+def _matching_etag(base_etag: str) -> Optional[str]:
+    """Das ETag aus If-None-Match, das zu base_etag (in beliebiger Kodierungsvariante) passt."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        return base_etag
+    for tag in if_none_match.as_set():
+        if tag == base_etag or tag.startswith(base_etag + '-'):
+            return tag
+    return None
+
+
+def _finish(response: Response, etag: Optional[str], encoding: Optional[str], cache_control: str,
+            headers: Optional[Dict[str, str]] = None) -> Response:
+    response.headers.update(headers or {})
+    if etag:
+        # Strenge ETags unterscheiden sich je Kodierung, da die Bytes verschieden sind
+        response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_json(data_tag: str, key: str, build_payload: Callable[[], Dict], cache_control: str,
+                headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    JSON-Antwort mit starkem ETag, 304-Behandlung und Kompression.
+
+    Args:
+        data_tag: Kennung der Daten, aus denen der Inhalt entsteht (ändert sich genau mit ihnen)
+        key: Eindeutiger Schlüssel der Antwort innerhalb dieser Daten
+        build_payload: Liefert den Inhalt, wenn er nicht zwischengespeichert ist
+        cache_control: Wert des Cache-Control Headers
+        headers: Zusätzliche Header, auch bei 304 (z.B. Metadaten, die nicht ins ETag eingehen)
+    """
+    etag = f"{data_tag}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]}"
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+
+    matched = _matching_etag(etag)
+    if matched:
+        response = Response(status=304)
+        response.headers.update(headers or {})
+        response.set_etag(matched)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def build_body() -> bytes:
+        return current_app.json.dumps(build_payload()).encode('utf-8')
+
+    body = _response_cache.get_or_build(data_tag, key, None, build_body)
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        identity = body
+        body = _response_cache.get_or_build(data_tag, key, encoding, lambda: identity)
+    else:
+        encoding = None
+    return _finish(Response(body, mimetype='application/json'), etag, encoding, cache_control, headers)
+
+
+def compressed_json(payload: Dict, status: int = 200, cache_control: str = 'no-store',
+                    etag: Optional[str] = None) -> Response:
+    """JSON-Antwort ohne Zwischenspeicher, aber mit Kompression (z.B. Suchergebnisse)."""
+    body = current_app.json.dumps(payload).encode('utf-8')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+    else:
+        encoding = None
+    return _finish(Response(body, status=status, mimetype='application/json'), etag, encoding, cache_control)
+
+
+def ndjson_stream(records: Iterable[Dict], cache_control: str = 'no-store') -> Response:
+    """
+    Gestreamte Antwort mit einem JSON-Objekt pro Zeile (application/x-ndjson).
+
+    Jede Zeile wird sofort gesendet; bei gzip wird nach jeder Zeile geflusht, damit
+    der Client nicht auf das Ende der Antwort warten muss. Brotli wird für Streams
+    nicht verwendet.
+    """
+    dumps = current_app.json.dumps
+    encoding = 'gzip' if accepts_gzip(request.headers.get('Accept-Encoding')) else None
+
+    def generate() -> Iterator[bytes]:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if encoding else None
+        for record in records:
+            line = dumps(record).encode('utf-8') + b'\n'
+            if compressor is None:
+                yield line
+            else:
+                yield compressor.compress(line) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressor is not None:
+            yield compressor.flush()
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    return _finish(response, None, encoding, cache_control)
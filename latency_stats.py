@@ -0,0 +1,23 @@
+"""Latenz-Perzentile für Benchmark und Lasttest."""
+
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Perzentil nach Nearest-Rank auf einer sortierten Liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(timings_ms: List[float]) -> Dict:
+    values = sorted(timings_ms)
+    return {
+        'n': len(values),
+        'p50_ms': round(percentile(values, 50), 4),
+        'p95_ms': round(percentile(values, 95), 4),
+        'p99_ms': round(percentile(values, 99), 4),
+        'mittel_ms': round(sum(values) / len(values), 4) if values else 0.0,
+        'max_ms': round(values[-1], 4) if values else 0.0
+    }
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Lasttest gegen eine laufende Instanz.
+
+Aufruf:
+    python loadtest.py --url http://localhost:5001 --concurrency 1,4,16 --stage-seconds 20
+    python loadtest.py --concurrency 8 --refresh-interval 5 --output loadtest_results.json
+
+Jeder Worker-Thread spielt einen Verkaufsmitarbeiter nach, mit eigener
+Keep-Alive-Verbindung und einer Mischung aus (Gewichte über --mix):
+
+- products: GET /api/products (Seite laden)
+- colors:   GET /api/colors/<produkt> für 1 bis --max-fields Felder
+            nacheinander, wie beim Ausfüllen des Formulars
+- search:   POST /api/search mit 1 bis --max-fields Kriterien aus dem Katalog
+            der Instanz (Katalogfarben, "Egal"), teils mit Veredelungen
+
+Die Gleichzeitigkeit steigt stufenweise (--concurrency); pro Stufe werden
+Durchsatz und p50/p95/p99 je Endpoint ausgegeben. Mit --refresh-interval wird
+während jeder Stufe regelmäßig /api/refresh ausgelöst und bis zum Abschluss
+verfolgt; Anfragen, die in ein Aktualisierungsfenster fallen, werden zusätzlich
+getrennt ausgewertet. Der Server fasst Aktualisierungen innerhalb von
+REFRESH_MIN_INTERVAL_SECONDS zusammen; ohne echtes Nachladen den Wert dort
+herabsetzen.
+
+Offline lässt sich die Instanz mit SHEETS_SOURCE=fake betreiben (siehe
+sheets_sources.py), z.B. mit SHEETS_FAKE_LATENCY_MS=200-800 für realistische
+Ladezeiten.
+"""
+
+import argparse
+import http.client
+import json
+import platform
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from latency_stats import summarize
+
+VEREDELUNGEN = (['Siebdruck'], ['Digitaldruck'], ['Stick'], ['Siebdruck', 'Stick'])
+DEFAULT_MIX = 'products=1,colors=3,search=6'
+# Produkte, deren Farben beim Start für die Suchkriterien abgefragt werden
+MAX_CATALOG_PRODUCTS = 200
+
+ENDPOINT_PRODUCTS = 'GET /api/products'
+ENDPOINT_COLORS = 'GET /api/colors/<produkt>'
+ENDPOINT_SEARCH = 'POST /api/search'
+ENDPOINT_REFRESH = 'GET /api/refresh'
+DURING_REFRESH = ' (während Aktualisierung)'
+
+
+class Connection:
+    """Keep-Alive-Verbindung eines Workers; wird nach Fehlern neu aufgebaut."""
+
+    def __init__(self, base_url: str, timeout: float):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.https = parsed.scheme == 'https'
+        self.host = parsed.netloc
+        self.prefix = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._conn = None
+
+    def request(self, method: str, path: str, body: Optional[Dict] = None,
+                compressed: bool = True) -> Tuple[int, bytes]:
+        headers = {'Accept-Encoding': 'gzip, br' if compressed else 'identity'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self._conn is None:
+            conn_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conn = conn_class(self.host, timeout=self.timeout)
+        try:
+            self._conn.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self._conn.getresponse()
+            data = response.read()
+            if response.getheader('Connection', '').lower() == 'close':
+                self.close()
+            return response.status, data
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Recorder:
+    """Sammelt (Endpoint, Start, Dauer, Erfolg) aller Anfragen einer Stufe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: List[Tuple[str, float, float, bool]] = []
+
+    def timed(self, endpoint: str, conn: Connection, method: str, path: str,
+              body: Optional[Dict] = None) -> Tuple[int, bytes]:
+        started = time.perf_counter()
+        try:
+            status, data = conn.request(method, path, body)
+            ok = status < 400
+        except Exception:
+            status, data, ok = 0, b'', False
+        duration_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.samples.append((endpoint, started, duration_ms, ok))
+        return status, data
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'products=1,colors=3,search=6' -> Gewichte."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('products', 'colors', 'search'):
+            raise argparse.ArgumentTypeError(f'Unbekannte Aktion im Mix: {name!r}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_concurrency(value: str) -> List[int]:
+    """'1,4,16' -> [1, 4, 16]."""
+    levels = [int(part) for part in value.split(',') if part.strip()]
+    if not levels or min(levels) < 1:
+        raise argparse.ArgumentTypeError('Gleichzeitigkeit muss >= 1 sein')
+    return levels
+
+
+def load_catalog(conn: Connection, max_products: int = MAX_CATALOG_PRODUCTS) -> Dict[str, List[str]]:
+    """Produkte und ihre Farben von der Instanz (Grundlage der Suchkriterien)."""
+    status, data = conn.request('GET', '/api/products', compressed=False)
+    if status != 200:
+        raise RuntimeError(f'/api/products antwortet mit {status}')
+    products = json.loads(data)['products']
+    catalog = {}
+    for product in products[:max_products]:
+        status, data = conn.request('GET', '/api/colors/' + urllib.parse.quote(product, safe=''),
+                                    compressed=False)
+        catalog[product] = json.loads(data).get('colors', []) if status == 200 else []
+    if not catalog:
+        raise RuntimeError('Die Instanz liefert keine Produkte')
+    return catalog
+
+
+def random_search(rng: random.Random, catalog: Dict[str, List[str]], max_fields: int,
+                  veredelung_rate: float) -> Dict:
+    """Suchanfrage mit 1 bis max_fields Kriterien, wie sie das Formular schickt."""
+    products = list(catalog)
+    criteria = []
+    for _ in range(rng.randint(1, max_fields)):
+        product = rng.choice(products)
+        color = rng.choice(catalog[product] + ['Egal'])
+        criteria.append({'product': product, 'color': color})
+    veredelung = list(rng.choice(VEREDELUNGEN)) if rng.random() < veredelung_rate else []
+    return {'search_criteria': criteria, 'veredelung_required': veredelung}
+
+
+def worker(conn: Connection, recorder: Recorder, catalog: Dict[str, List[str]], mix: Dict[str, float],
+           args: argparse.Namespace, seed: int, stop: threading.Event):
+    rng = random.Random(seed)
+    actions, weights = list(mix), list(mix.values())
+    products = list(catalog)
+    while not stop.is_set():
+        action = rng.choices(actions, weights)[0]
+        if action == 'products':
+            recorder.timed(ENDPOINT_PRODUCTS, conn, 'GET', '/api/products')
+        elif action == 'colors':
+            for _ in range(rng.randint(1, args.max_fields)):
+                if stop.is_set():
+                    break
+                product = rng.choice(products)
+                recorder.timed(ENDPOINT_COLORS, conn, 'GET', '/api/colors/' + urllib.parse.quote(product, safe=''))
+        else:
+            recorder.timed(ENDPOINT_SEARCH, conn, 'POST', '/api/search',
+                           random_search(rng, catalog, args.max_fields, args.veredelung_rate))
+        if args.think_ms:
+            stop.wait(rng.uniform(0, 2 * args.think_ms) / 1000)
+    conn.close()
+
+
+def refresh_loop(conn: Connection, recorder: Recorder, interval: float, stop: threading.Event,
+                 windows: List[Tuple[float, float]], jobs: List[Dict]):
+    """Löst regelmäßig /api/refresh aus und verfolgt den Auftrag bis zum Ende."""
+    while not stop.wait(interval):
+        started = time.perf_counter()
+        status, data = recorder.timed(ENDPOINT_REFRESH, conn, 'GET', '/api/refresh')
+        if status not in (200, 202):
+            jobs.append({'status': 'fehler', 'http_status': status})
+            continue
+        job = json.loads(data)
+        final = job['status']
+        while final in ('queued', 'running'):
+            time.sleep(0.1)
+            poll_status, poll_data = conn.request('GET', f"/api/refresh/{job['job_id']}", compressed=False)
+            if poll_status != 200:
+                final = 'unbekannt'
+                break
+            final = json.loads(poll_data)['status']
+        ended = time.perf_counter()
+        jobs.append({
+            'status': final,
+            'zusammengefasst': job.get('bereits_laufend', False),
+            'dauer_ms': round((ended - started) * 1000, 1)
+        })
+        if not job.get('bereits_laufend'):
+            windows.append((started, ended))
+    conn.close()
+
+
+def evaluate(samples: List[Tuple[str, float, float, bool]], elapsed_s: float,
+             windows: List[Tuple[float, float]]) -> Dict[str, Dict]:
+    """Durchsatz und Perzentile pro Endpoint; mit Aktualisierungen zusätzlich nur deren Zeitfenster."""
+    groups: Dict[str, Tuple[List[float], List[bool]]] = {}
+
+    def add(name, duration_ms, ok):
+        timings, outcomes = groups.setdefault(name, ([], []))
+        outcomes.append(ok)
+        if ok:
+            timings.append(duration_ms)
+
+    for endpoint, started, duration_ms, ok in samples:
+        add(endpoint, duration_ms, ok)
+        if endpoint != ENDPOINT_REFRESH and any(started < end and started + duration_ms / 1000 > begin
+                                                for begin, end in windows):
+            add(endpoint + DURING_REFRESH, duration_ms, ok)
+
+    order = [ENDPOINT_PRODUCTS, ENDPOINT_COLORS, ENDPOINT_SEARCH, ENDPOINT_REFRESH]
+    result = {}
+    for name in sorted(groups, key=lambda n: (n.endswith(DURING_REFRESH), order.index(n.replace(DURING_REFRESH, '')))):
+        timings, outcomes = groups[name]
+        stats = summarize(timings)
+        stats['anfragen'] = len(outcomes)
+        stats['fehler'] = outcomes.count(False)
+        if not name.endswith(DURING_REFRESH):
+            stats['durchsatz_rps'] = round(len(outcomes) / elapsed_s, 2) if elapsed_s else 0.0
+        result[name] = stats
+    return result
+
+
+def run_stage(concurrency: int, catalog: Dict[str, List[str]], mix: Dict[str, float],
+              args: argparse.Namespace, stage_index: int) -> Dict:
+    """Eine Stufe mit fester Gleichzeitigkeit über --stage-seconds."""
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [threading.Thread(target=worker, args=(Connection(args.url, args.timeout), recorder, catalog, mix,
+                                                     args, args.seed * 10007 + stage_index * 1009 + i, stop),
+                                daemon=True)
+               for i in range(concurrency)]
+    windows: List[Tuple[float, float]] = []
+    jobs: List[Dict] = []
+    if args.refresh_interval:
+        threads.append(threading.Thread(target=refresh_loop, args=(Connection(args.url, args.timeout), recorder,
+                                                                   args.refresh_interval, stop, windows, jobs),
+                                        daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.stage_seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(args.timeout + 1)
+    elapsed_s = time.perf_counter() - started
+
+    samples = recorder.samples
+    total = [sample for sample in samples if sample[0] != ENDPOINT_REFRESH]
+    result = {
+        'gleichzeitig': concurrency,
+        'dauer_s': round(elapsed_s, 2),
+        'anfragen': len(total),
+        'fehler': sum(1 for sample in total if not sample[3]),
+        'durchsatz_rps': round(len(total) / elapsed_s, 2) if elapsed_s else 0.0,
+        'endpoints': evaluate(samples, elapsed_s, windows)
+    }
+    if args.refresh_interval:
+        result['aktualisierungen'] = jobs
+    return result
+
+
+def print_stage(stage: Dict):
+    print(f"\n{stage['gleichzeitig']} gleichzeitig: {stage['anfragen']} Anfragen in {stage['dauer_s']} s, "
+          f"{stage['durchsatz_rps']} Anfragen/s, {stage['fehler']} Fehler")
+    print(f"{'Endpoint':52} {'n':>7} {'Anfr./s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Fehler':>7}")
+    for name, stats in stage['endpoints'].items():
+        throughput = stats.get('durchsatz_rps')
+        print(f"{name:52} {stats['anfragen']:>7} {throughput if throughput is not None else '':>8} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['fehler']:>7}")
+    jobs = stage.get('aktualisierungen')
+    if jobs is not None:
+        own = [job for job in jobs if not job.get('zusammengefasst')]
+        print(f"Aktualisierungen: {len(jobs)} ausgelöst, {len(own)} eigene, "
+              f"{sum(1 for job in jobs if job['status'] != 'done')} nicht erfolgreich")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Lasttest der API-Endpoints einer laufenden Instanz')
+    parser.add_argument('--url', default='http://localhost:5001', help='Basis-URL der Instanz')
+    parser.add_argument('--concurrency', type=parse_concurrency, default=[1, 4, 16],
+                        help='Gleichzeitige Nutzer pro Stufe, z.B. 1,4,16 (Standard)')
+    parser.add_argument('--stage-seconds', type=float, default=20, help='Dauer pro Stufe')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Gewichte der Aktionen (Standard: {DEFAULT_MIX})')
+    parser.add_argument('--max-fields', type=int, default=5, help='Maximale Anzahl Produktfelder pro Suche')
+    parser.add_argument('--veredelung-rate', type=float, default=0.3, help='Anteil Suchen mit Veredelung')
+    parser.add_argument('--think-ms', type=float, default=0, help='Mittlere Pause zwischen Aktionen')
+    parser.add_argument('--refresh-interval', type=float, default=0,
+                        help='Sekunden zwischen zwei /api/refresh während der Stufen (0 = aus)')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout pro Anfrage in Sekunden')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='loadtest_results.json', help='JSON-Datei für die Ergebnisse')
+    args = parser.parse_args(argv)
+
+    catalog = load_catalog(Connection(args.url, args.timeout))
+    print(f"{args.url}: {len(catalog)} Produkte im Katalog")
+
+    report = {
+        'erstellt': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'url': args.url,
+        'mix': args.mix,
+        'stufe_s': args.stage_seconds,
+        'aktualisierung_alle_s': args.refresh_interval,
+        'seed': args.seed,
+        'stufen': []
+    }
+    for i, concurrency in enumerate(args.concurrency):
+        stage = run_stage(concurrency, catalog, args.mix, args, i)
+        report['stufen'].append(stage)
+        print_stage(stage)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nErgebnisse geschrieben: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Logging-Konfiguration der WebApp.
+
+LOG_LEVEL steuert die Ausgabe (Standard INFO), LOG_FORMAT wählt zwischen
+'json' (eine JSON-Zeile pro Eintrag, Standard) und 'text'. Zusätzliche Felder
+werden über extra={...} übergeben und erscheinen als eigene Schlüssel.
+"""
+
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+# Attribute, die jeder LogRecord hat; alles andere stammt aus extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatiert Einträge als einzeilige JSON-Objekte."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Lesbares Format für die lokale Entwicklung; Zusatzfelder als key=value."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return text
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """Richtet den Root-Logger einmalig ein (mehrfacher Aufruf ersetzt den Handler)."""
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'json')).lower()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+    handler.set_name('probepaket')
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if existing.get_name() == 'probepaket':
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
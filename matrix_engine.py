@@ -0,0 +1,205 @@
+"""
+Alternative Such-Engine auf Basis von NumPy-Matrizen (SEARCH_ENGINE=numpy).
+
+Lager_neu wird als Ganzzahlmatrix Produktzeilen × Paketspalten abgelegt: jede
+Zellfarbe erhält einen Code aus einem Farbvokabular (0 = leere Zelle). Ein
+Suchkriterium wird zu einer Nachschlagetabelle Code -> passt, die auf die Zeilen
+des Produkts angewendet und spaltenweise mit any() reduziert wird. Kriterien,
+Verfügbarkeit und Veredelungen sind boolesche Vektoren pro Paket und werden mit
+& verknüpft.
+
+Die Ergebnisse entsprechen exakt denen der Suche über PaketIndex.
+"""
+
+import copy
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from paket_index import CellEntry, PaketIndex
+
+# Veredelung -> Zeile in Lager_neu (Zellwert '1' = vorhanden)
+VEREDELUNG_ROWS = (('Siebdruck', 179), ('Digitaldruck', 180), ('Stick', 181))
+
+
+class LagerMatrix:
+    """Farbcode-Matrix der Produktzeilen mit Veredelungs- und Verfügbarkeitsvektoren pro Paket."""
+
+    def __init__(self, lager_data, index: PaketIndex):
+        self.index = index
+        package_numbers = index.package_numbers
+        n_columns = len(package_numbers)
+
+        # Eindeutige Pakete; doppelte Paketnummern teilen sich einen Eintrag
+        self.packages: List[str] = list(dict.fromkeys(package_numbers))
+        package_ids = {package_number: i for i, package_number in enumerate(self.packages)}
+        # Matrixspalte -> Paket
+        self.column_package = np.array([package_ids[p] for p in package_numbers], dtype=np.intp)
+        # Paket -> Matrixspalten (aufsteigend)
+        self.package_columns: List[np.ndarray] = [np.flatnonzero(self.column_package == i)
+                                                  for i in range(len(self.packages))]
+
+        # Matrixzeile -> Zeile in Lager_neu bzw. Größe (nur Zeilen, die zu einem Produkt gehören)
+        sheet_rows = sorted(row for rows in index.product_rows.values() for row in rows)
+        positions = {row: i for i, row in enumerate(sheet_rows)}
+        self.sheet_rows = np.array(sheet_rows, dtype=np.intp)
+        self.sizes: List[str] = [lager_data[row][1].strip() for row in sheet_rows]
+        # Produkt -> Matrixzeilen
+        self.product_rows: Dict[str, np.ndarray] = {
+            product: np.array([positions[row] for row in rows], dtype=np.intp)
+            for product, rows in index.product_rows.items()
+        }
+
+        # Farbvokabular: Code -> Farbe (Code 0 = leere Zelle). Es wird zuerst vollständig
+        # bestimmt, damit die Matrix gleich mit dem kleinsten passenden Typ angelegt wird.
+        color_codes: Dict[str, int] = {}
+        for row in sheet_rows:
+            for color in lager_data[row][2:2 + n_columns]:
+                color = color.strip() if color else ''
+                if color and color not in color_codes:
+                    color_codes[color] = len(color_codes) + 1
+        self.colors: List[str] = [''] + list(color_codes)
+
+        self.codes = np.zeros((len(sheet_rows), n_columns), dtype=np.min_scalar_type(len(self.colors)))
+        for i, row in enumerate(sheet_rows):
+            for col, color in enumerate(lager_data[row][2:2 + n_columns]):
+                color = color.strip() if color else ''
+                if color:
+                    self.codes[i, col] = color_codes[color]
+
+        # Veredelung -> Paketvektor (wie get_veredelung_info: erste Spalte des Pakets)
+        self.veredelung: Dict[str, np.ndarray] = {}
+        for name, row in VEREDELUNG_ROWS:
+            flags = np.zeros(len(self.packages), dtype=bool)
+            if len(lager_data) >= 181 and len(lager_data) > row:
+                values = lager_data[row]
+                for i, package_number in enumerate(self.packages):
+                    col = index.package_columns[package_number]
+                    flags[i] = len(values) > col and values[col] == '1'
+            self.veredelung[name] = flags
+        self.package_veredelungen: List[Tuple[str, ...]] = [
+            tuple(name for name, _ in VEREDELUNG_ROWS if self.veredelung[name][i])
+            for i in range(len(self.packages))
+        ]
+
+        self.available = self._availability(index)
+
+    def _availability(self, index: PaketIndex) -> np.ndarray:
+        return np.array([index.is_available(package_number) for package_number in self.packages], dtype=bool)
+
+    def with_monday(self, index: PaketIndex) -> 'LagerMatrix':
+        """Neue Matrix für einen Index mit anderen monday Daten; nur die Verfügbarkeit wird neu berechnet."""
+        matrix = copy.copy(self)
+        matrix.index = index
+        matrix.available = self._availability(index)
+        return matrix
+
+    def _hits(self, criterion: Tuple[str, str], memo: Dict) -> Optional[np.ndarray]:
+        """Boolesche Matrix Produktzeilen × Spalten für ein Kriterium (None bei unbekanntem Produkt)."""
+        key = ('matrix', criterion)
+        if key not in memo:
+            product, gewünschte_farbe = criterion
+            rows = self.product_rows.get(product)
+            if rows is None:
+                memo[key] = None
+            else:
+                compatible = self.index.color_table.compatible(gewünschte_farbe)
+                lookup = np.array([False] + [color in compatible for color in self.colors[1:]])
+                memo[key] = lookup[self.codes[rows]]
+        return memo[key]
+
+    def iter_match(self, criteria: Tuple[Tuple[str, str], ...], veredelung_required: Optional[List[str]],
+                   memo: Optional[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Verfügbare Pakete, die alle Kriterien und Veredelungen erfüllen, einzeln in Spaltenreihenfolge.
+        Die Paketvektoren werden vorab berechnet, die Zellen eines Pakets erst bei seiner Ausgabe.
+
+        Returns:
+            (Paketnummer, {'monday', 'veredelungen', 'cells': Kriterium -> passende Zellen})
+            (gleiches Format wie ProbepaketFinder._iter_match_packages)
+        """
+        if memo is None:
+            memo = {}
+
+        mask = self._base_mask(veredelung_required)
+        if mask is None:
+            return
+
+        hits_by_criterion = {}
+        for criterion in criteria:
+            hits = self._hits(criterion, memo)
+            if hits is None:
+                return
+            columns = hits.any(axis=0)
+            mask &= np.bincount(self.column_package[columns], minlength=len(self.packages)) > 0
+            if not mask.any():
+                return
+            hits_by_criterion[criterion] = hits
+
+        for package_id in np.flatnonzero(mask):
+            package_number = self.packages[package_id]
+            columns = self.package_columns[package_id]
+            yield package_number, {
+                'monday': self.index.monday_records[package_number],
+                'veredelungen': self.package_veredelungen[package_id],
+                'cells': {criterion: self._cells(criterion, hits, columns)
+                          for criterion, hits in hits_by_criterion.items()}
+            }
+
+    def iter_match_partial(self, criteria: Tuple[Tuple[str, str], ...], veredelung_required: Optional[List[str]],
+                           min_criteria: int, memo: Optional[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Verfügbare Pakete, die mindestens min_criteria der Kriterien und alle Veredelungen erfüllen.
+        Die erfüllten Kriterien werden pro Paket in einem Vektor aufsummiert.
+
+        Returns:
+            Wie iter_match, 'cells' enthält nur die erfüllten Kriterien
+        """
+        if memo is None:
+            memo = {}
+
+        mask = self._base_mask(veredelung_required)
+        if mask is None:
+            return
+
+        counts = np.zeros(len(self.packages), dtype=np.int32)
+        hits_by_criterion = {}
+        for criterion in criteria:
+            hits = self._hits(criterion, memo)
+            if hits is None:
+                continue
+            present = np.bincount(self.column_package[hits.any(axis=0)], minlength=len(self.packages)) > 0
+            counts += present
+            hits_by_criterion[criterion] = (hits, present)
+        mask &= counts >= max(1, min_criteria)
+
+        for package_id in np.flatnonzero(mask):
+            package_number = self.packages[package_id]
+            columns = self.package_columns[package_id]
+            yield package_number, {
+                'monday': self.index.monday_records[package_number],
+                'veredelungen': self.package_veredelungen[package_id],
+                'cells': {criterion: self._cells(criterion, hits, columns)
+                          for criterion, (hits, present) in hits_by_criterion.items() if present[package_id]}
+            }
+
+    def _base_mask(self, veredelung_required: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Verfügbare Pakete mit allen geforderten Veredelungen (None bei unbekannter Veredelung)."""
+        mask = self.available.copy()
+        for name in set(veredelung_required or []):
+            flags = self.veredelung.get(name)
+            if flags is None:
+                return None
+            mask &= flags
+        return mask
+
+    def _cells(self, criterion: Tuple[str, str], hits: np.ndarray, columns: np.ndarray) -> List[CellEntry]:
+        """Passende Zellen eines Pakets in Zeilenreihenfolge (wie PaketIndex.matching_cells)."""
+        rows = self.product_rows[criterion[0]]
+        cells = []
+        for r, c in zip(*np.nonzero(hits[:, columns])):
+            row = rows[r]
+            col = columns[c]
+            cells.append((int(self.sheet_rows[row]), int(col) + 2, self.sizes[row],
+                          self.colors[self.codes[row, col]]))
+        return cells
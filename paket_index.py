@@ -0,0 +1,209 @@
+"""
+Vorberechneter Suchindex über die Lager_neu und monday Tabellen sowie der
+Produktkatalog aus der Farben Tabelle.
+
+Index und Katalog werden einmal pro Datenladevorgang aufgebaut und ersetzen die
+verschachtelten Schleifen über Zeilen × Paketspalten × Suchkriterien, die
+linearen Suchen in monday und das Durchsuchen von Farben bei jeder Anfrage
+durch Dictionary-Lookups und Mengen-Schnittmengen.
+"""
+
+import copy
+import re
+from enum import Enum
+from typing import List, Dict, Optional, Sequence, Set, Tuple
+
+from color_table import ColorTable
+
+# Ab dieser Zeile beginnen in Lager_neu die Produktzeilen (davor Header)
+FIRST_PRODUCT_ROW = 4
+
+# Paketnummer im Element-Feld der monday Tabelle, z.B. "Probepaket 1017"
+PACKAGE_ELEMENT_RE = re.compile(r'Probepaket (\S+)')
+
+# Zeilen in Farben, deren erste Zelle eines dieser Wörter enthält, sind Farbzeilen
+COLOR_WORDS = ('blue', 'white', 'black', 'green', 'red', 'pink', 'orange', 'yellow', 'purple', 'grey', 'brown', 'apricot')
+
+# Ein Eintrag pro gefüllter Zelle: (Zeile, Spalte, Größe, Farbe)
+CellEntry = Tuple[int, int, str, str]
+
+
+class MondayStatus(Enum):
+    """Normalisierter Paketstatus aus der monday Tabelle."""
+    IM_LAGER = 'Im Lager'
+    RESERVIERT = 'Reserviert'
+    VERSENDET = 'Versendet'
+    SONSTIGE = 'Sonstige'
+    UNBEKANNT = 'Unbekannt'
+
+    @classmethod
+    def from_raw(cls, status: Optional[str]) -> 'MondayStatus':
+        """Ordnet den Rohtext einer Statuszelle einem Enum-Wert zu."""
+        if not status or not str(status).strip():
+            return cls.UNBEKANNT
+        text = str(status).strip()
+        if text == cls.IM_LAGER.value:
+            return cls.IM_LAGER
+        lower = text.lower()
+        if 'reserviert' in lower:
+            return cls.RESERVIERT
+        if 'versendet' in lower or 'gesendet' in lower:
+            return cls.VERSENDET
+        return cls.SONSTIGE
+
+
+class PaketIndex:
+    """Invertierter Index: Produkt → Zeilen, (Produkt, Farbe) → Pakete, Paketnummer → monday/Spalte."""
+
+    def __init__(self, lager_data: List[List[str]], monday_data: Optional[List[List[str]]] = None,
+                 color_synonyms: Sequence[Sequence[str]] = ()):
+        self.package_numbers: List[str] = list(lager_data[0][2:]) if lager_data else []
+        # Paketnummer -> Spaltenindex in Lager_neu (erste Spalte gewinnt)
+        self.package_columns: Dict[str, int] = {}
+        for i, package_number in enumerate(self.package_numbers):
+            self.package_columns.setdefault(package_number, i + 2)
+        # Produkt -> Zeilenindizes in Lager_neu
+        self.product_rows: Dict[str, List[int]] = {}
+        # Produkt -> alle vorkommenden Zellfarben (in Reihenfolge des ersten Auftretens)
+        self.product_colors: Dict[str, List[str]] = {}
+        # (Produkt, Zellfarbe) -> Paketnummern, die diese Kombination enthalten
+        self.color_packages: Dict[Tuple[str, str], Set[str]] = {}
+        # (Produkt, Paketnummer) -> gefüllte Zellen in Zeilenreihenfolge
+        self.cells: Dict[Tuple[str, str], List[CellEntry]] = {}
+
+        # Paketnummer -> monday Datensatz bzw. normalisierter Status
+        self.monday_records: Dict[str, Dict] = {}
+        self.monday_status: Dict[str, MondayStatus] = {}
+
+        if lager_data:
+            self._build(lager_data)
+        # Farbwunsch -> passende Zellfarben
+        self.color_table = ColorTable((color for colors in self.product_colors.values() for color in colors),
+                                      color_synonyms)
+        if monday_data:
+            self._build_monday(monday_data)
+
+    def _build(self, lager_data: List[List[str]]):
+        """Einmaliger Durchlauf über alle Produktzeilen (gleiche Regeln wie die bisherige Suche)."""
+        package_numbers = self.package_numbers
+        current_product = None
+        for row_idx, row in enumerate(lager_data[FIRST_PRODUCT_ROW:], start=FIRST_PRODUCT_ROW):
+            if not row or len(row) < 2:
+                continue
+
+            product_name = row[0].strip()
+            size = row[1].strip()
+
+            # Wenn product_name nicht leer ist, ist es ein neues Produkt
+            if product_name:
+                current_product = product_name
+            if current_product is None:
+                continue
+
+            self.product_rows.setdefault(current_product, []).append(row_idx)
+            colors = self.product_colors.setdefault(current_product, [])
+
+            for col_idx, color in enumerate(row[2:], start=2):
+                if col_idx - 2 >= len(package_numbers):
+                    break
+                if not color or not color.strip():
+                    continue
+
+                package_color = color.strip()
+                package_number = package_numbers[col_idx - 2]
+
+                key = (current_product, package_color)
+                if key not in self.color_packages:
+                    self.color_packages[key] = set()
+                    colors.append(package_color)
+                self.color_packages[key].add(package_number)
+                self.cells.setdefault((current_product, package_number), []).append(
+                    (row_idx, col_idx, size, package_color)
+                )
+
+    def _build_monday(self, monday_data: List[List[str]]):
+        """Paketnummer -> Datensatz aus monday (ab Zeile 1, erste Zeile pro Paket gewinnt)."""
+        for row in monday_data[1:]:
+            if not row or len(row) < 1:
+                continue
+
+            element = row[0]
+            if not element:
+                continue
+
+            status = row[2] if len(row) > 2 else 'Unbekannt'
+            record = {
+                'element': element,
+                'status': status,
+                'lieferschein': row[3] if len(row) > 3 else None
+            }
+            for package_number in PACKAGE_ELEMENT_RE.findall(element):
+                if package_number not in self.monday_records:
+                    self.monday_records[package_number] = record
+                    self.monday_status[package_number] = MondayStatus.from_raw(status)
+
+    def with_monday(self, monday_data: List[List[str]]) -> 'PaketIndex':
+        """Neuer Index mit anderen monday Daten; die Lager_neu Strukturen werden geteilt."""
+        index = copy.copy(self)
+        index.monday_records = {}
+        index.monday_status = {}
+        if monday_data:
+            index._build_monday(monday_data)
+        return index
+
+    def is_available(self, package_number: str) -> bool:
+        """True, wenn das Paket laut monday "Im Lager" ist."""
+        return self.monday_status.get(package_number) is MondayStatus.IM_LAGER
+
+    def packages_for(self, product: str, gewünschte_farbe: str) -> Set[str]:
+        """Alle Pakete, die das Produkt in einer passenden Farbe enthalten."""
+        compatible = self.color_table.compatible(gewünschte_farbe)
+        packages: Set[str] = set()
+        for package_color in self.product_colors.get(product, []):
+            if package_color in compatible:
+                packages |= self.color_packages[(product, package_color)]
+        return packages
+
+    def matching_cells(self, product: str, gewünschte_farbe: str, package_number: str) -> List[CellEntry]:
+        """Zellen eines Pakets, die Produkt und Farbwunsch erfüllen (in Zeilenreihenfolge)."""
+        compatible = self.color_table.compatible(gewünschte_farbe)
+        return [entry for entry in self.cells.get((product, package_number), []) if entry[3] in compatible]
+
+
+class ProductCatalog:
+    """Produktliste und Farben pro Produkt aus der Farben Tabelle."""
+
+    def __init__(self, farben_data: List[List[str]]):
+        # Sortierte Produktnamen (ohne Farbzeilen)
+        self.products: List[str] = []
+        # Erste Zelle einer Zeile -> Farben, "Egal" immer an Position 0
+        self.colors: Dict[str, List[str]] = {}
+
+        if farben_data:
+            self._build(farben_data)
+
+    def _build(self, farben_data: List[List[str]]):
+        products = set()
+        for i, row in enumerate(farben_data):
+            if not row or len(row) < 1:
+                continue
+
+            product_name = row[0].strip()
+            # Nur echte Produktnamen aufnehmen (nicht Farben)
+            if product_name and not any(color_word in product_name.lower() for color_word in COLOR_WORDS):
+                products.add(product_name)
+
+            # Die Farben stehen in der nächsten Zeile (i+1)
+            colors = self.colors.setdefault(product_name, ['Egal'])
+            if i + 1 < len(farben_data):
+                for color in farben_data[i + 1]:
+                    if color and color.strip():
+                        color_name = color.strip()
+                        if color_name not in colors:
+                            colors.append(color_name)
+
+        self.products = sorted(products)
+
+    def colors_for(self, product: str) -> List[str]:
+        """Farben eines Produkts; unbekannte Produkte haben nur "Egal"."""
+        return list(self.colors.get(product, ['Egal']))
@@ -0,0 +1,168 @@
+"""
+Sortierung und seitenweise Ausgabe von Suchergebnissen.
+
+Sortierungen (Parameter 'sort'):
+
+- relevanz:   Reihenfolge der zeilenweisen Suche (erste Fundstelle des ersten
+              erfüllten Kriteriums, Standard)
+- groessen:   meiste passende Größen zuerst
+- veredelung: meiste angebotene Veredelungen zuerst
+- nummer:     aufsteigende Paketnummer
+
+Bei Teiltreffern (siehe ProbepaketFinder._iter_match_partial) stehen Pakete mit
+mehr erfüllten Kriterien immer vor solchen mit weniger; die Sortierung gilt
+innerhalb gleicher Anzahl.
+
+Eine Seite wird über limit/offset oder einen Cursor gewählt. Der Cursor
+enthält den Sortierschlüssel des letzten Pakets der vorigen Seite, Folgeseiten
+bleiben daher auch nach einer Aktualisierung lückenlos. Für eine Seite werden
+nur die obersten offset + limit Pakete über einen Heap bestimmt statt alle zu
+sortieren; Antwortobjekte entstehen nur für die Pakete der Seite.
+"""
+
+import base64
+import heapq
+import json
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+SORT_ORDERS = ('relevanz', 'groessen', 'veredelung', 'nummer')
+DEFAULT_SORT = 'relevanz'
+
+Criterion = Tuple[str, str]
+
+
+def _number(package_number: str) -> int:
+    """Numerischer Teil des Schlüssels; nicht-numerische Nummern kommen ans Ende."""
+    return int(package_number) if package_number.isdigit() else sys.maxsize
+
+
+def _relevance_key(package_number: str, match: Dict, order: List[Criterion]) -> tuple:
+    cells = match['cells']
+    first = next(criterion for criterion in order if criterion in cells)
+    row, col = cells[first][0][:2]
+    return (row, col, package_number)
+
+
+def _sizes_key(package_number: str, match: Dict, order: List[Criterion]) -> tuple:
+    sizes = sum(len({size for _, _, size, _ in cells}) for cells in match['cells'].values())
+    return (-sizes, _number(package_number), package_number)
+
+
+def _veredelung_key(package_number: str, match: Dict, order: List[Criterion]) -> tuple:
+    return (-len(match['veredelungen']), _number(package_number), package_number)
+
+
+def _number_key(package_number: str, match: Dict, order: List[Criterion]) -> tuple:
+    return (_number(package_number), package_number)
+
+
+_SORT_KEYS: Dict[str, Callable[[str, Dict, List[Criterion]], tuple]] = {
+    'relevanz': _relevance_key,
+    'groessen': _sizes_key,
+    'veredelung': _veredelung_key,
+    'nummer': _number_key,
+}
+# Länge der Schlüssel in select (inkl. vorangestellter Anzahl erfüllter Kriterien):
+# ganze Zahlen, zuletzt die Paketnummer als String
+_KEY_LENGTHS = {'relevanz': 4, 'groessen': 4, 'veredelung': 4, 'nummer': 3}
+
+
+def encode_cursor(sort: str, key: tuple) -> str:
+    raw = json.dumps([sort, list(key)], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, tuple]:
+    """Cursor -> (Sortierung, Schlüssel); ValueError bei ungültigem Cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort, key = json.loads(raw)
+    except Exception:
+        raise ValueError('Ungültiger Cursor')
+    if sort not in _SORT_KEYS or not _valid_key(sort, key):
+        raise ValueError('Ungültiger Cursor')
+    return sort, tuple(key)
+
+
+def _valid_key(sort: str, key) -> bool:
+    """Passt der Schlüssel aus dem Cursor zur Form der Schlüssel dieser Sortierung?"""
+    if not isinstance(key, list) or len(key) != _KEY_LENGTHS[sort] or not isinstance(key[-1], str):
+        return False
+    return all(isinstance(part, int) and not isinstance(part, bool) for part in key[:-1])
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    """Gewünschte Sortierung und Seite einer Suche."""
+    sort: str = DEFAULT_SORT
+    limit: Optional[int] = None
+    offset: int = 0
+    # Sortierschlüssel des letzten Pakets der vorigen Seite (aus dem Cursor)
+    after: Optional[tuple] = None
+
+    @classmethod
+    def from_request(cls, data: Dict) -> 'PageRequest':
+        """
+        Liest 'sort', 'limit', 'offset' und 'cursor' aus einem Request-Body.
+
+        Raises:
+            ValueError: bei unbekannter Sortierung, ungültigen Zahlen oder Cursor
+        """
+        sort = str(data.get('sort') or DEFAULT_SORT).lower()
+        if sort not in _SORT_KEYS:
+            raise ValueError(f"Unbekannte Sortierung: {sort!r} (möglich: {', '.join(SORT_ORDERS)})")
+        limit = _non_negative(data.get('limit'), 'limit')
+        if limit == 0:
+            raise ValueError('limit muss größer als 0 sein')
+        offset = _non_negative(data.get('offset'), 'offset') or 0
+        after = None
+        if data.get('cursor'):
+            cursor_sort, after = decode_cursor(str(data['cursor']))
+            if cursor_sort != sort:
+                raise ValueError('Cursor gehört zu einer anderen Sortierung')
+        return cls(sort, limit, offset, after)
+
+    def select(self, matches: Dict[str, Dict], order: List[Criterion]) -> Tuple[List[str], Optional[str]]:
+        """
+        Paketnummern der Seite in Sortierreihenfolge und Cursor der Folgeseite.
+
+        Args:
+            matches: Paketnummer -> Treffer (siehe ProbepaketFinder._iter_match_packages)
+            order: Suchkriterien in der Reihenfolge der Anfrage (für die Sortierung 'relevanz')
+
+        Returns:
+            (Paketnummern, Cursor oder None, wenn keine weiteren Pakete folgen)
+        """
+        key_for = _SORT_KEYS[self.sort]
+        # Erfüllte Kriterien zuerst (bei vollständigen Treffern für alle Pakete gleich)
+        keys = ((-len(match['cells']),) + key_for(package_number, match, order)
+                for package_number, match in matches.items())
+        if self.after is not None:
+            keys = (key for key in keys if key > self.after)
+
+        if self.limit is None:
+            selected = sorted(keys)[self.offset:]
+            has_more = False
+        else:
+            end = self.offset + self.limit
+            # Ein Paket mehr als nötig, um zu wissen, ob eine Folgeseite existiert
+            top = heapq.nsmallest(end + 1, keys)
+            has_more = len(top) > end
+            selected = top[self.offset:end]
+
+        next_cursor = encode_cursor(self.sort, selected[-1]) if has_more and selected else None
+        return [key[-1] for key in selected], next_cursor
+
+
+def _non_negative(value, name: str) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} muss eine ganze Zahl sein')
+    if number < 0:
+        raise ValueError(f'{name} darf nicht negativ sein')
+    return number
@@ -0,0 +1,257 @@
+"""
+Hintergrund-Aktualisierung der Google Sheets Daten.
+
+Ein einzelner Worker-Thread lädt die Daten periodisch (Intervall mit Jitter)
+oder auf Anforderung neu. Anfragen werden währenddessen weiter mit den
+zuletzt erfolgreich geladenen Daten bedient (stale-while-revalidate).
+
+Welche Tabellenblätter bzw. Bereiche bei einem periodischen Durchlauf fällig
+sind, bestimmt ein RefreshSchedule mit eigener TTL pro Bereich. Der Worker
+schläft bis zum nächsten fälligen Bereich (Jitter nur nach oben), damit kein
+Durchlauf zu früh kommt, nichts fällig findet und erst ein Intervall später lädt.
+
+Angeforderte Aktualisierungen werden zusammengefasst: Solange eine vollständige
+läuft oder wartet, bekommen weitere Anfragen denselben Auftrag; innerhalb des
+Mindestabstands nach dem letzten angeforderten Versuch, ob erfolgreich oder
+nicht, wird keine neue gestartet. Ein periodischer Durchlauf lädt nur die
+fälligen Bereiche und wird daher nicht als Ergebnis geliefert: Wartet er noch,
+wird er zu einer vollständigen Aktualisierung, läuft er schon, wird danach eine
+eingereiht.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Status eines Aktualisierungsauftrags
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+def load_ttl_config(defaults: Dict[str, float], env_names: Dict[str, str],
+                    config_path: Optional[str] = None) -> Dict[str, float]:
+    """
+    TTLs pro Aktualisierungsbereich in Sekunden.
+
+    Reihenfolge: Standardwerte, dann JSON-Datei ({"ttl": {"monday": 60, ...}}),
+    dann Umgebungsvariablen. Eine TTL <= 0 schließt den Bereich vom periodischen
+    Laden aus.
+    """
+    ttls = dict(defaults)
+    if config_path and os.path.exists(config_path):
+        with open(config_path, encoding='utf-8') as f:
+            ttls.update({name: float(value) for name, value in json.load(f).get('ttl', {}).items()})
+    for name, env_name in env_names.items():
+        if os.getenv(env_name):
+            ttls[name] = float(os.getenv(env_name))
+    return ttls
+
+
+class RefreshSchedule:
+    """Merkt sich pro Bereich den letzten Abruf und liefert die fälligen Bereiche."""
+
+    def __init__(self, ttls: Dict[str, float]):
+        self.ttls = ttls
+        self._fetched_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Bereiche, deren TTL abgelaufen ist (nie geladene Bereiche sind immer fällig)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [name for name, ttl in self.ttls.items()
+                    if ttl > 0 and now - self._fetched_at.get(name, float('-inf')) >= ttl]
+
+    def mark_fetched(self, names: Iterable[str], now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for name in names:
+                self._fetched_at[name] = now
+
+    def seconds_until_due(self, now: Optional[float] = None) -> Optional[float]:
+        """Sekunden bis zum nächsten fälligen Bereich (0 = jetzt fällig, None = keine TTL aktiv)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            remaining = [self._fetched_at.get(name, float('-inf')) + ttl - now
+                         for name, ttl in self.ttls.items() if ttl > 0]
+        return max(0.0, min(remaining)) if remaining else None
+
+    def min_ttl(self) -> float:
+        """Kürzeste aktive TTL (0, wenn keine aktiv ist)."""
+        active = [ttl for ttl in self.ttls.values() if ttl > 0]
+        return min(active) if active else 0
+
+
+class BackgroundRefresher:
+    """Führt Aktualisierungsaufträge nacheinander in einem Daemon-Thread aus."""
+
+    # Kürzeste Wartezeit zwischen zwei periodischen Durchläufen in Sekunden
+    min_delay = 1.0
+
+    def __init__(self, refresh_fn: Callable[[str], None], interval: float = 600, jitter: float = 60,
+                 max_jobs: int = 50, min_interval: float = 0,
+                 due_in: Optional[Callable[[], Optional[float]]] = None):
+        """
+        Args:
+            refresh_fn: Lädt die Daten neu und veröffentlicht sie; erhält den Anlass
+                ('scheduled', 'manual', ...) und wirft bei Fehlern
+            interval: Sekunden zwischen automatischen Aktualisierungen (<= 0 deaktiviert sie);
+                mit due_in die längste Wartezeit
+            jitter: Maximale zufällige Verlängerung der Wartezeit in Sekunden
+            max_jobs: Anzahl der Aufträge, deren Status aufbewahrt wird
+            min_interval: Mindestabstand in Sekunden zwischen zwei angeforderten Aktualisierungen
+            due_in: Liefert die Sekunden bis zum nächsten fälligen Bereich (siehe
+                RefreshSchedule.seconds_until_due); nach einem fehlgeschlagenen periodischen
+                Durchlauf wird stattdessen das volle Intervall gewartet
+        """
+        self.refresh_fn = refresh_fn
+        self.interval = interval
+        self.jitter = jitter
+        self.max_jobs = max_jobs
+        self.min_interval = min_interval
+        self.due_in = due_in
+        self._scheduled_failed = False
+        # Laufender bzw. wartender Auftrag (der zuletzt angeforderte oder ein periodischer) und letzter
+        # beendeter angeforderter Versuch (erfolgreich oder fehlgeschlagen) samt Zeitpunkt
+        self._active: Optional[Dict] = None
+        self._last_finished: Optional[Dict] = None
+        self._last_finished_at = float('-inf')
+        self._queue: 'queue.Queue[Dict]' = queue.Queue()
+        self._jobs: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Startet den Worker-Thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='sheets-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Beendet den Worker-Thread nach dem laufenden Auftrag."""
+        self._stopped.set()
+        self._queue.put({})
+
+    def trigger(self, reason: str = 'manual') -> Dict:
+        """
+        Reiht eine vollständige Aktualisierung ein und gibt sofort den Auftragsstatus zurück.
+
+        Läuft bzw. wartet bereits eine vollständige oder endete der letzte Versuch weniger
+        als min_interval Sekunden zuvor, wird stattdessen dieser Auftrag geliefert
+        ('coalesced': True). Fehlgeschlagene Versuche zählen mit, damit bei Fehlern der
+        Sheets API (z.B. 429) nicht jeder Klick ein neues vollständiges Laden auslöst.
+        Ein noch nicht gestarteter periodischer Auftrag wird zum vollständigen; ein
+        laufender periodischer lädt nur die fälligen Bereiche, daher folgt ein neuer Auftrag.
+        """
+        with self._lock:
+            active = self._active
+            if active is not None and active['reason'] != 'scheduled':
+                return dict(active, coalesced=True)
+            if active is not None and active['status'] == JOB_QUEUED:
+                # _execute liest den Anlass erst nach dem Start unter self._lock
+                active['reason'] = reason
+                return dict(active, coalesced=True)
+            if self._last_finished is not None and time.monotonic() - self._last_finished_at < self.min_interval:
+                return dict(self._last_finished, coalesced=True)
+            job = self._register(self._new_job(reason))
+            self._active = job
+            status = dict(job, coalesced=False)
+        self._queue.put(job)
+        return status
+
+    def job_status(self, job_id: str) -> Optional[Dict]:
+        """Aktueller Status eines Auftrags (Kopie) oder None, wenn unbekannt."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _new_job(self, reason: str) -> Dict:
+        return {
+            'id': uuid.uuid4().hex,
+            'status': JOB_QUEUED,
+            'reason': reason,
+            'created': datetime.now().isoformat(),
+            'started': None,
+            'finished': None,
+            'error': None
+        }
+
+    def _register(self, job: Dict) -> Dict:
+        """Nimmt einen Auftrag in die Statusliste auf (Aufrufer hält self._lock)."""
+        self._jobs[job['id']] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        return job
+
+    def _next_delay(self) -> Optional[float]:
+        if self.interval <= 0:
+            return None
+        delay = self.interval
+        if self.due_in is not None and not self._scheduled_failed:
+            due = self.due_in()
+            if due is not None:
+                delay = min(delay, due)
+        # Jitter nur nach oben: ein zu früher Durchlauf fände nichts fällig
+        return max(self.min_delay, delay + random.uniform(0, self.jitter))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                job = self._queue.get(timeout=self._next_delay())
+            except queue.Empty:
+                with self._lock:
+                    if self._active is not None:
+                        # Angeforderter Auftrag wurde gerade eingereiht, er ersetzt den periodischen
+                        continue
+                    job = self._register(self._new_job('scheduled'))
+                    self._active = job
+            if self._stopped.is_set():
+                break
+            self._execute(job)
+
+    def _execute(self, job: Dict):
+        with self._lock:
+            job['status'] = JOB_RUNNING
+            job['started'] = datetime.now().isoformat()
+            reason = job['reason']
+        try:
+            self.refresh_fn(reason)
+        except Exception as e:
+            # Alte Daten bleiben aktiv, der Fehler wird nur am Auftrag vermerkt
+            logger.exception("Hintergrund-Aktualisierung fehlgeschlagen", extra={'job_id': job['id']})
+            with self._lock:
+                job['status'] = JOB_FAILED
+                job['error'] = str(e)
+                self._finish(job)
+            return
+        with self._lock:
+            job['status'] = JOB_DONE
+            self._finish(job)
+        logger.debug("Aktualisierung abgeschlossen", extra={'job_id': job['id'], 'reason': job['reason']})
+
+    def _finish(self, job: Dict):
+        """Vermerkt das Ende eines Auftrags; angeforderte zählen für den Mindestabstand (Aufrufer hält self._lock)."""
+        job['finished'] = datetime.now().isoformat()
+        if job is self._active:
+            self._active = None
+        if job['reason'] == 'scheduled':
+            self._scheduled_failed = job['status'] == JOB_FAILED
+        else:
+            self._last_finished = job
+            self._last_finished_at = time.monotonic()
@@ -0,0 +1,86 @@
+"""
+LRU-Zwischenspeicher für Suchergebnisse.
+
+Schlüssel sind die normalisierten Suchkriterien (Reihenfolge egal, getrimmt,
+Farben klein geschrieben), die gewünschten Veredelungen und die Version des
+Datenstands. Sobald ein neuer Datenstand gesehen wird, werden alle Einträge
+verworfen.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Grobe Speicherschätzung pro Eintrag bzw. pro gespeicherter Zelle in Bytes
+_ENTRY_OVERHEAD_BYTES = 512
+_CELL_BYTES = 160
+
+
+class SearchResultCache:
+    """Begrenzter LRU-Cache (Anzahl und geschätzter Speicher) mit Trefferzählern."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Maximale Anzahl Einträge (0 deaktiviert den Cache)
+            max_bytes: Obergrenze für den geschätzten Speicherverbrauch
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._version: Optional[int] = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_version(self, version: int) -> bool:
+        """Verwirft alle Einträge bei neuerer Version; False für Anfragen auf älteren Ständen."""
+        if self._version is None or version > self._version:
+            self._version = version
+            self._entries.clear()
+            self._bytes = 0
+        return version == self._version
+
+    def get(self, version: int, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, version: int, key: Hashable, value: Any, cells: int):
+        """Speichert ein Ergebnis; cells ist die Anzahl enthaltener Zellen für die Speicherschätzung."""
+        if self.max_entries <= 0:
+            return
+        size = _ENTRY_OVERHEAD_BYTES + cells * _CELL_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'version': self._version,
+                'eintraege': len(self._entries),
+                'bytes_geschaetzt': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else None
+            }
@@ -0,0 +1,138 @@
+"""
+Langlebiger Google Sheets Client.
+
+Credentials, Sheets Service und HTTP-Transporte werden einmal pro Prozess
+angelegt und bei jeder Aktualisierung wiederverwendet:
+
+- Das Access Token bleibt bis kurz vor Ablauf gültig und wird dann unter einer
+  Sperre genau einmal erneuert, auch wenn mehrere Threads gleichzeitig laden.
+- Jeder Thread erhält ein eigenes autorisiertes httplib2.Http (nicht
+  thread-sicher), das seine Verbindung offen hält (Keep-Alive).
+- Der Service wird aus dem mit google-api-python-client ausgelieferten
+  Discovery-Dokument gebaut (static_discovery), ohne Netzwerkzugriff.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+
+
+def load_service_account_credentials():
+    """Service Account Credentials aus der Umgebung (Render-tauglich)."""
+    from google.oauth2.service_account import Credentials as ServiceAccountCredentials
+
+    # Support both names so you don't have to rename your Render secret
+    raw = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON') or os.getenv('GOOGLE_CREDENTIALS_JSON')
+    if raw:
+        # Env var contains the **full service account JSON** pasted as-is
+        info = json.loads(raw)
+        if info.get('type') != 'service_account':
+            raise ValueError(f"Expected a service_account JSON, got type={info.get('type')!r}")
+        return ServiceAccountCredentials.from_service_account_info(info, scopes=SCOPES)
+
+    if os.getenv('GOOGLE_APPLICATION_CREDENTIALS') and os.path.exists(os.getenv('GOOGLE_APPLICATION_CREDENTIALS')):
+        # Or: use a Secret File mounted at that path
+        return ServiceAccountCredentials.from_service_account_file(
+            os.getenv('GOOGLE_APPLICATION_CREDENTIALS'),
+            scopes=SCOPES
+        )
+
+    raise RuntimeError(
+        "No service account credentials found. "
+        "Set GOOGLE_SERVICE_ACCOUNT_JSON (or GOOGLE_CREDENTIALS_JSON) "
+        "or mount a Secret File and set GOOGLE_APPLICATION_CREDENTIALS."
+    )
+
+
+class SheetsClient:
+    """Sheets Service plus Credentials und Transporte, die über alle Aktualisierungen bestehen bleiben."""
+
+    def __init__(self, credentials, timeout: float = 30, refresh_margin: float = 300):
+        """
+        Args:
+            credentials: google-auth Credentials
+            timeout: Socket-Timeout der HTTP-Transporte in Sekunden
+            refresh_margin: Sekunden vor Ablauf, ab denen das Token erneuert wird
+        """
+        started = time.perf_counter()
+        from googleapiclient.discovery import build
+
+        self.credentials = credentials
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self._local = threading.local()
+        self._token_lock = threading.Lock()
+        self.token_refreshes = 0
+        # Dauer der Startphasen in ms ('auth': Credentials und erstes Token, 'client_build': Service)
+        self.timings: Dict[str, float] = {}
+
+        # cache_discovery=False avoids writing .cache on ephemeral FS
+        self.service = build('sheets', 'v4', http=self.http(), static_discovery=True, cache_discovery=False)
+        self.timings['client_build'] = round((time.perf_counter() - started) * 1000, 1)
+
+    def new_http(self):
+        """Neues autorisiertes Http-Objekt (für Worker-Threads mit eigenem Transport)."""
+        import google_auth_httplib2
+        import httplib2
+
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+
+    def http(self):
+        """Http-Objekt des aufrufenden Threads (wird pro Thread einmal angelegt und wiederverwendet)."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = self.new_http()
+        return http
+
+    def _token_fresh(self) -> bool:
+        expiry: Optional[datetime] = self.credentials.expiry
+        if not self.credentials.token or expiry is None:
+            return False
+        # google-auth speichert expiry als naive UTC-Zeit
+        return expiry - datetime.utcnow() > timedelta(seconds=self.refresh_margin)
+
+    def ensure_token(self):
+        """Erneuert das Access Token, wenn es fehlt oder bald abläuft (höchstens ein Thread gleichzeitig)."""
+        if self._token_fresh():
+            return
+        import google_auth_httplib2
+        import httplib2
+
+        with self._token_lock:
+            if self._token_fresh():
+                return
+            started = time.perf_counter()
+            self.credentials.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=self.timeout)))
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.token_refreshes += 1
+            if self.token_refreshes == 1:
+                self.timings['auth'] = round(self.timings.get('auth', 0) + duration_ms, 1)
+            logger.info("Access Token erneuert", extra={'dauer_ms': duration_ms, 'gueltig_bis': self.credentials.expiry})
+
+
+_shared_client: Optional[SheetsClient] = None
+_shared_lock = threading.Lock()
+
+
+def shared_client(timeout: float = 30) -> SheetsClient:
+    """Prozessweiter SheetsClient; wird beim ersten Aufruf aus den Umgebungs-Credentials angelegt."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                started = time.perf_counter()
+                credentials = load_service_account_credentials()
+                auth_ms = round((time.perf_counter() - started) * 1000, 1)
+                client = SheetsClient(credentials, timeout=timeout)
+                client.timings['auth'] = round(client.timings.get('auth', 0) + auth_ms, 1)
+                _shared_client = client
+                logger.info("Sheets Client erstellt", extra={'phasen_ms': dict(client.timings)})
+    return _shared_client
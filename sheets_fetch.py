@@ -0,0 +1,124 @@
+"""
+Paralleles Laden einzelner Tabellenbereiche (SHEETS_FETCH_MODE=parallel).
+
+Jeder Bereich wird mit einem eigenen values.get Aufruf in einem Thread-Pool
+geladen; die Gesamtdauer entspricht damit etwa der des langsamsten Blatts.
+Antworten werden im Worker dekodiert und in unveränderliche Zeilen umgewandelt,
+sobald sie eintreffen.
+
+googleapiclient-Services teilen sich ein httplib2.Http, das nicht thread-sicher
+ist. Jeder Worker-Thread erhält deshalb ein eigenes Http-Objekt, das er für alle
+seine Anfragen wiederverwendet (Keep-Alive); die Requests werden mit
+execute(http=...) darauf ausgeführt.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from snapshot import SheetRows, freeze_rows
+
+logger = logging.getLogger(__name__)
+
+
+class _LockedHttp:
+    """Geteiltes Http-Objekt, das nur von einem Thread gleichzeitig benutzt wird."""
+
+    def __init__(self, http):
+        self._http = http
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            return self._http.request(*args, **kwargs)
+
+
+def http_factory_for(service, timeout: float) -> Callable[[], Any]:
+    """
+    Erzeugt pro Aufruf ein neues, autorisiertes Http-Objekt mit Timeout.
+
+    Ohne google-auth Credentials am Service (z.B. bei einem eigenen Http-Objekt)
+    wird dessen Http-Objekt geteilt und serialisiert.
+    """
+    base = service._http
+    credentials = getattr(base, 'credentials', None)
+    if credentials is None:
+        shared = _LockedHttp(base)
+        return lambda: shared
+
+    import google_auth_httplib2
+    import httplib2
+
+    return lambda: google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=timeout))
+
+
+class ParallelFetcher:
+    """Lädt mehrere A1-Bereiche gleichzeitig, mit einem Http-Objekt pro Worker-Thread."""
+
+    def __init__(self, http_factory: Callable[[], Any], max_workers: int = 4, timeout: float = 30):
+        """
+        Args:
+            http_factory: Liefert ein neues httplib2-kompatibles Http-Objekt
+            max_workers: Anzahl paralleler Anfragen
+            timeout: Sekunden, die auf jeden Bereich höchstens gewartet wird
+        """
+        self.http_factory = http_factory
+        self.timeout = timeout
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sheets-fetch')
+
+    def _http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = self.http_factory()
+        return http
+
+    def _fetch_one(self, service, spreadsheet_id: str, a1_range: str, value_render_option: str) -> Tuple[SheetRows, Dict]:
+        response_sizes = []
+        request = service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=a1_range,
+            valueRenderOption=value_render_option,
+            majorDimension='ROWS',
+            fields='range,values'
+        )
+        postproc = request.postproc
+        def _measure(resp, content):
+            response_sizes.append(len(content or b''))
+            return postproc(resp, content)
+        request.postproc = _measure
+
+        started = time.perf_counter()
+        result = request.execute(http=self._http())
+        rows = freeze_rows(result.get('values', []))
+        return rows, {'dauer_ms': round((time.perf_counter() - started) * 1000, 1), 'bytes': sum(response_sizes)}
+
+    def fetch(self, service, spreadsheet_id: str, ranges: Dict[str, str],
+              value_render_option: str) -> Iterator[Tuple[str, SheetRows, Dict]]:
+        """
+        Lädt alle Bereiche gleichzeitig.
+
+        Args:
+            ranges: Name -> A1-Bereich
+
+        Yields:
+            (Name, Zeilen, {'dauer_ms', 'bytes'}) in der Reihenfolge des Eintreffens
+
+        Raises:
+            TimeoutError, wenn ein Bereich nicht innerhalb des Timeouts eintrifft, sowie
+            Fehler der einzelnen Anfragen
+        """
+        futures = {
+            self._executor.submit(self._fetch_one, service, spreadsheet_id, a1_range, value_render_option): name
+            for name, a1_range in ranges.items()
+        }
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                rows, stats = future.result()
+                logger.debug("Bereich geladen", extra={'bereich': futures[future], **stats})
+                yield futures[future], rows, stats
+        finally:
+            for future in futures:
+                future.cancel()
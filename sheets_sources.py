@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Austauschbare Datenquellen für die Sheets API (SHEETS_SOURCE).
+
+- 'live':   echte Google Sheets API (langlebiger SheetsClient)
+- 'fake':   beantwortet values.get und values.batchGet aus einer lokalen
+            Fixture-Datei, optional mit künstlicher Latenz und Fehlern
+- 'record': wie 'live', speichert aber jede Antwort zusätzlich in der
+            Fixture-Datei, die später mit 'fake' abgespielt werden kann
+
+Alle Quellen liefern einen Client mit derselben Schnittstelle wie SheetsClient
+(service, http(), new_http(), ensure_token(), timings). Der Fake setzt auf
+HTTP-Ebene an: googleapiclient baut und parst die Anfragen wie im Betrieb,
+Fehler kommen als HttpError an.
+
+Fixture-Format: {"values": {"<A1-Bereich>": [[...], ...]}}. Bereiche ohne
+exakten Eintrag werden aus dem Eintrag des ganzen Blatts ausgeschnitten.
+
+Eine Fixture aus synthetischen Daten erzeugen:
+    python sheets_sources.py --scale medium --output cache/sheets_fixture.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+from sheets_client import SheetsClient, load_service_account_credentials, shared_client
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('live', 'fake', 'record')
+
+_VALUES_PATH_RE = re.compile(r'/v4/spreadsheets/[^/]+/values/(.+)$')
+_A1_RE = re.compile(r'([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?')
+
+
+def _sheet_name(a1_range: str) -> str:
+    return a1_range.split('!', 1)[0].strip("'")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def slice_a1(rows: List[List[str]], a1_range: str) -> List[List[str]]:
+    """Schneidet einen A1-Bereich ('Blatt', 'Blatt!180:182', 'Blatt!A1:ZZ182') aus den Zeilen eines Blatts."""
+    if '!' not in a1_range:
+        return rows
+    spec = a1_range.split('!', 1)[1].upper()
+    match = _A1_RE.fullmatch(spec)
+    if not match:
+        raise ValueError(f"Unbekannter A1-Bereich: {a1_range}")
+    first_col, first_row, last_col, last_row = match.groups()
+    if ':' not in spec:
+        last_col, last_row = first_col, first_row
+
+    row_start = int(first_row) - 1 if first_row else 0
+    row_end = int(last_row) if last_row else len(rows)
+    col_start = _column_index(first_col) if first_col else 0
+    col_end = _column_index(last_col) + 1 if last_col else None
+
+    result = []
+    for row in rows[row_start:row_end]:
+        cells = list(row[col_start:col_end])
+        # Die API lässt leere Zellen am Zeilenende und leere Zeilen am Ende weg
+        while cells and cells[-1] == '':
+            cells.pop()
+        result.append(cells)
+    while result and not result[-1]:
+        result.pop()
+    return result
+
+
+class FixtureStore:
+    """Fixture-Datei mit Sheets-Antworten; wird bei Änderung der Datei neu gelesen."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._values: Dict[str, List[List[str]]] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with open(self.path, encoding='utf-8') as f:
+                self._values = json.load(f).get('values', {})
+            self._mtime = mtime
+
+    def get(self, a1_range: str) -> List[List[str]]:
+        """Werte eines Bereichs: exakter Eintrag oder Ausschnitt aus dem ganzen Blatt."""
+        with self._lock:
+            self._reload()
+            if a1_range in self._values:
+                return self._values[a1_range]
+            sheet = self._values.get(_sheet_name(a1_range))
+        if sheet is None:
+            raise KeyError(a1_range)
+        return slice_a1(sheet, a1_range)
+
+    def record(self, values: Dict[str, List[List[str]]]):
+        """Übernimmt Bereiche in die Datei (atomar ersetzt)."""
+        with self._lock:
+            self._reload()
+            self._values.update(values)
+            write_fixture(self.path, self._values)
+            self._mtime = os.stat(self.path).st_mtime
+
+
+def write_fixture(path: str, values: Dict[str, List[List[str]]]):
+    """Schreibt eine Fixture-Datei atomar."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fixture-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'values': values}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _requested_ranges(uri: str) -> Tuple[str, List[str]]:
+    """('get' | 'batchGet' | 'other', angefragte A1-Bereiche) einer Sheets-URL."""
+    parsed = urllib.parse.urlparse(uri)
+    if parsed.path.endswith('/values:batchGet'):
+        return 'batchGet', urllib.parse.parse_qs(parsed.query).get('ranges', [])
+    match = _VALUES_PATH_RE.search(parsed.path)
+    if match:
+        return 'get', [urllib.parse.unquote(match.group(1))]
+    return 'other', []
+
+
+class FixtureHttp:
+    """httplib2-kompatibler Transport, der Sheets-Anfragen aus einer FixtureStore beantwortet."""
+
+    def __init__(self, store: FixtureStore, latency_ms: Tuple[float, float] = (0, 0), error_rate: float = 0,
+                 error_status: int = 503, seed: Optional[int] = None):
+        """
+        Args:
+            store: Quelle der Werte
+            latency_ms: Künstliche Antwortzeit pro Anfrage (gleichverteilt zwischen min und max)
+            error_rate: Anteil der Anfragen, die mit error_status beantwortet werden
+            error_status: HTTP-Status der künstlichen Fehler
+            seed: Startwert für reproduzierbare Latenzen und Fehler
+        """
+        self.store = store
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        with self._lock:
+            self.requests += 1
+            delay = self._random.uniform(*self.latency_ms) / 1000
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.errors += 1
+            return self._response(httplib2, self.error_status, {'error': {
+                'code': self.error_status, 'message': 'Künstlicher Fehler (SHEETS_FAKE_ERROR_RATE)', 'status': 'UNAVAILABLE'
+            }})
+
+        kind, ranges = _requested_ranges(uri)
+        try:
+            if kind == 'batchGet':
+                payload = {'valueRanges': [{'range': a1, 'majorDimension': 'ROWS', 'values': self.store.get(a1)}
+                                           for a1 in ranges]}
+            elif kind == 'get':
+                payload = {'range': ranges[0], 'majorDimension': 'ROWS', 'values': self.store.get(ranges[0])}
+            else:
+                payload = {'properties': {'title': 'Fixture'}}
+        except KeyError as e:
+            return self._response(httplib2, 400, {'error': {
+                'code': 400, 'message': f'Unable to parse range: {e.args[0]}', 'status': 'INVALID_ARGUMENT'
+            }})
+        return self._response(httplib2, 200, payload)
+
+    @staticmethod
+    def _response(httplib2, status: int, payload: Dict):
+        return (httplib2.Response({'status': str(status), 'content-type': 'application/json; charset=UTF-8'}),
+                json.dumps(payload).encode('utf-8'))
+
+
+class FakeSheetsClient:
+    """Client-Schnittstelle wie SheetsClient, aber ohne Credentials und Netzwerk."""
+
+    def __init__(self, http: FixtureHttp):
+        from googleapiclient.discovery import build
+
+        started = time.perf_counter()
+        self.http_transport = http
+        self.service = build('sheets', 'v4', http=http, static_discovery=True, cache_discovery=False)
+        self.timings: Dict[str, float] = {'client_build': round((time.perf_counter() - started) * 1000, 1)}
+
+    def new_http(self) -> FixtureHttp:
+        # FixtureHttp ist thread-sicher und kann geteilt werden
+        return self.http_transport
+
+    def http(self) -> FixtureHttp:
+        return self.http_transport
+
+    def ensure_token(self):
+        pass
+
+
+class RecordingHttp:
+    """Leitet Anfragen an den echten Transport weiter und speichert erfolgreiche Werte-Antworten."""
+
+    def __init__(self, http, store: FixtureStore):
+        self._http = http
+        self.store = store
+
+    def __getattr__(self, name):
+        # Weitere Attribute (z.B. credentials) vom echten Transport
+        return getattr(self._http, name)
+
+    def request(self, uri, *args, **kwargs):
+        response, content = self._http.request(uri, *args, **kwargs)
+        kind, ranges = _requested_ranges(uri)
+        if kind != 'other' and int(response.status) == 200:
+            try:
+                payload = json.loads(content)
+                if kind == 'batchGet':
+                    value_ranges = payload.get('valueRanges', [])
+                    values = {a1: value_ranges[i].get('values', []) for i, a1 in enumerate(ranges)
+                              if i < len(value_ranges)}
+                else:
+                    values = {ranges[0]: payload.get('values', [])}
+                self.store.record(values)
+                logger.debug("Antwort aufgezeichnet", extra={'bereiche': list(values), 'datei': self.store.path})
+            except Exception as e:
+                logger.warning("Antwort konnte nicht aufgezeichnet werden: %s", e)
+        return response, content
+
+
+class RecordingClient(SheetsClient):
+    """SheetsClient, dessen Transporte alle Werte-Antworten in einer Fixture-Datei ablegen."""
+
+    def __init__(self, credentials, store: FixtureStore, timeout: float = 30):
+        self.fixture_store = store
+        super().__init__(credentials, timeout=timeout)
+
+    def new_http(self):
+        return RecordingHttp(super().new_http(), self.fixture_store)
+
+
+_recording_client: Optional[RecordingClient] = None
+_recording_lock = threading.Lock()
+
+
+def connect(source: str, timeout: float = 30, fixture_path: Optional[str] = None,
+            latency_ms: Tuple[float, float] = (0, 0), error_rate: float = 0, error_status: int = 503,
+            seed: Optional[int] = None):
+    """
+    Client für die gewählte Datenquelle.
+
+    Args:
+        source: 'live', 'fake' oder 'record'
+        fixture_path: Fixture-Datei für 'fake' (lesen) bzw. 'record' (schreiben)
+        latency_ms, error_rate, error_status, seed: Verhalten des Fakes (siehe FixtureHttp)
+    """
+    global _recording_client
+    if source == 'live':
+        return shared_client(timeout)
+    if source not in SOURCES:
+        raise ValueError(f"Unbekannte Datenquelle: {source}")
+    if not fixture_path:
+        raise RuntimeError(f"SHEETS_SOURCE={source} braucht eine Fixture-Datei (SHEETS_FIXTURE_FILE)")
+
+    if source == 'fake':
+        if not os.path.exists(fixture_path):
+            raise RuntimeError(f"Fixture-Datei nicht gefunden: {fixture_path}")
+        return FakeSheetsClient(FixtureHttp(FixtureStore(fixture_path), latency_ms, error_rate, error_status, seed))
+
+    # Wie shared_client einmal pro Prozess, damit Token und Transporte erhalten bleiben
+    if _recording_client is None:
+        with _recording_lock:
+            if _recording_client is None:
+                started = time.perf_counter()
+                credentials = load_service_account_credentials()
+                auth_ms = round((time.perf_counter() - started) * 1000, 1)
+                client = RecordingClient(credentials, FixtureStore(fixture_path), timeout=timeout)
+                client.timings['auth'] = round(client.timings.get('auth', 0) + auth_ms, 1)
+                _recording_client = client
+    return _recording_client
+
+
+def parse_latency(value: Optional[str]) -> Tuple[float, float]:
+    """'50' oder '20-200' (Millisekunden) -> (min, max)."""
+    if not value:
+        return 0.0, 0.0
+    low, _, high = value.partition('-')
+    return float(low), float(high or low)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from synthetic_data import generate_sheets, parse_scale
+
+    parser = argparse.ArgumentParser(description='Fixture-Datei aus synthetischen Daten erzeugen')
+    parser.add_argument('--scale', default='small', help="'small', 'medium', 'large' oder PAKETExZEILEN")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join('cache', 'sheets_fixture.json'))
+    args = parser.parse_args(argv)
+
+    packages, product_rows = parse_scale(args.scale)
+    write_fixture(args.output, generate_sheets(packages, product_rows, seed=args.seed))
+    print(f"Fixture geschrieben: {args.output} ({packages} Pakete, {product_rows} Produktzeilen)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,266 @@
+"""
+Unveränderlicher, versionierter Datenstand der Google Sheets.
+
+Ein DataSnapshot bündelt die geladenen Tabellenblätter und alle daraus
+abgeleiteten Indizes. Neue Stände werden vollständig aufgebaut und dann mit
+einer einzigen Zuweisung veröffentlicht; Leser holen sich einmal pro Anfrage
+eine Referenz und sehen so immer einen in sich konsistenten Stand.
+
+Der zuletzt geladene Stand kann auf der Platte abgelegt werden, damit die App
+nach einem Kaltstart sofort antworten kann (siehe save_snapshot/load_snapshot).
+Die Datei vermerkt Tabelle und Datenquelle; passt beides nicht zur laufenden
+Konfiguration, wird sie ignoriert.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from paket_index import PaketIndex, ProductCatalog
+
+if TYPE_CHECKING:
+    from matrix_engine import LagerMatrix
+
+# Dateiformat: Magic, Schema-Version, Länge und SHA-256 der zlib-komprimierten JSON-Nutzdaten
+SNAPSHOT_MAGIC = b'PPSN'
+SNAPSHOT_SCHEMA_VERSION = 2
+_HEADER = struct.Struct('>4sHQ32s')
+
+# Zeilen eines Tabellenblatts, unveränderlich
+SheetRows = Tuple[Tuple[str, ...], ...]
+
+
+def freeze_rows(values: Optional[List[List[str]]]) -> SheetRows:
+    """Wandelt die Werte eines Tabellenblatts in verschachtelte Tupel um (bereits umgewandelte bleiben unverändert)."""
+    if isinstance(values, tuple) and all(isinstance(row, tuple) for row in values):
+        return values
+    return tuple(tuple(row) for row in (values or []))
+
+
+def content_hash(values) -> str:
+    """Inhaltshash eines Tabellenblatts (Listen und Tupel ergeben denselben Wert)."""
+    return hashlib.sha1(json.dumps(values or [], separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """Geladene Tabellenblätter plus abgeleitete Indizes mit fortlaufender Version."""
+    version: int
+    farben_data: SheetRows
+    monday_data: SheetRows
+    lager_data: SheetRows
+    index: PaketIndex
+    catalog: ProductCatalog
+    last_update: Optional[datetime] = None
+    load_stats: Optional[Dict] = field(default=None, compare=False)
+    # Tabellenblatt -> Inhaltshash, um unveränderte Blätter beim nächsten Laden zu erkennen
+    sheet_hashes: Dict[str, str] = field(default_factory=dict, compare=False)
+    # Farbcode-Matrix für SEARCH_ENGINE=numpy (sonst None)
+    matrix: Optional['LagerMatrix'] = field(default=None, compare=False)
+
+    @property
+    def catalog_tag(self) -> str:
+        """Kennung des Produktkatalogs für ETags: ändert sich nur mit dem Inhalt von Farben."""
+        return f"c-{self.sheet_hashes.get('Farben', '')[:12]}"
+
+    @classmethod
+    def build(cls, version: int, farben_data, monday_data, lager_data,
+              load_stats: Optional[Dict] = None, last_update: Optional[datetime] = None,
+              previous: Optional['DataSnapshot'] = None, engine: str = 'python',
+              color_synonyms: Sequence[Sequence[str]] = (),
+              hashes: Optional[Dict[str, str]] = None) -> 'DataSnapshot':
+        """
+        Baut einen neuen Datenstand inklusive Index auf.
+        hashes sind die bereits berechneten Inhaltshashes (siehe sheet_hashes_for).
+
+        Ist ein vorheriger Stand angegeben, werden Tabellenblätter mit gleichem
+        Inhaltshash samt abgeleiteter Strukturen übernommen. Hat sich nur monday
+        geändert, wird lediglich die Verfügbarkeit im Index neu aufgebaut.
+        Ein Tabellenblatt, das als None übergeben wird, gilt als nicht neu
+        geladen und wird ungeprüft aus dem vorherigen Stand übernommen.
+        Mit engine='numpy' wird zusätzlich die Farbcode-Matrix aufgebaut.
+        Die Farbverträglichkeit wird für alle Katalogfarben vorab berechnet.
+        """
+        if hashes is None:
+            hashes = cls.sheet_hashes_for(farben_data, monday_data, lager_data, previous)
+        unchanged = {name for name, digest in hashes.items()
+                     if previous is not None and previous.sheet_hashes.get(name) == digest}
+
+        farben = previous.farben_data if 'Farben' in unchanged else freeze_rows(farben_data)
+        monday = previous.monday_data if 'monday' in unchanged else freeze_rows(monday_data)
+        lager = previous.lager_data if 'Lager_neu' in unchanged else freeze_rows(lager_data)
+
+        if 'Lager_neu' not in unchanged:
+            index = PaketIndex(lager, monday, color_synonyms)
+        elif 'monday' not in unchanged:
+            index = previous.index.with_monday(monday)
+        else:
+            index = previous.index
+
+        catalog = previous.catalog if 'Farben' in unchanged else ProductCatalog(farben)
+        index.color_table.warm(color for colors in catalog.colors.values() for color in colors)
+
+        matrix = None
+        if engine == 'numpy':
+            if previous is None or previous.matrix is None or 'Lager_neu' not in unchanged:
+                from matrix_engine import LagerMatrix
+                matrix = LagerMatrix(lager, index)
+            elif index is not previous.index:
+                matrix = previous.matrix.with_monday(index)
+            else:
+                matrix = previous.matrix
+
+        if load_stats is not None:
+            load_stats = dict(load_stats, neu_aufgebaut=sorted(set(hashes) - unchanged))
+
+        return cls(
+            version=version,
+            farben_data=farben,
+            monday_data=monday,
+            lager_data=lager,
+            index=index,
+            catalog=catalog,
+            last_update=last_update or datetime.now(),
+            load_stats=load_stats,
+            sheet_hashes=hashes,
+            matrix=matrix
+        )
+
+    @staticmethod
+    def sheet_hashes_for(farben_data, monday_data, lager_data,
+                         previous: Optional['DataSnapshot'] = None) -> Dict[str, str]:
+        """Inhaltshashes der Tabellenblätter; None übernimmt den Hash aus dem vorherigen Stand."""
+        values = {'Farben': farben_data, 'monday': monday_data, 'Lager_neu': lager_data}
+        hashes = {}
+        for name, rows in values.items():
+            if rows is None and previous is not None and name in previous.sheet_hashes:
+                hashes[name] = previous.sheet_hashes[name]
+            else:
+                hashes[name] = content_hash(rows)
+        return hashes
+
+    @classmethod
+    def empty(cls) -> 'DataSnapshot':
+        """Leerer Stand (Version 0), solange noch nichts geladen wurde."""
+        return cls(version=0, farben_data=(), monday_data=(), lager_data=(), index=PaketIndex([]),
+                   catalog=ProductCatalog([]))
+
+
+class SnapshotStore:
+    """Hält den aktuellen Datenstand und veröffentlicht neue Stände atomar."""
+
+    def __init__(self, engine: str = 'python', color_synonyms: Sequence[Sequence[str]] = ()):
+        """
+        Args:
+            engine: Such-Engine, für die die Stände aufgebaut werden ('python' oder 'numpy')
+            color_synonyms: Gruppen gleichwertiger Farbwünsche
+        """
+        self.engine = engine
+        self.color_synonyms = color_synonyms
+        self._current = DataSnapshot.empty()
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> DataSnapshot:
+        """Referenz auf den aktuellen Stand (einmal pro Anfrage holen)."""
+        return self._current
+
+    def restore(self, snapshot: DataSnapshot):
+        """Übernimmt einen gespeicherten Stand; spätere Versionen zählen von dort weiter."""
+        with self._lock:
+            if snapshot.version <= self._current.version:
+                return
+            self._version = max(self._version, snapshot.version)
+            self._current = snapshot
+
+    def publish(self, farben_data, monday_data, lager_data, load_stats: Optional[Dict] = None) -> DataSnapshot:
+        """
+        Baut einen Stand mit der nächsten Versionsnummer und tauscht ihn atomar ein.
+        Ist kein Tabellenblatt inhaltlich verändert, bleibt der aktuelle Stand (samt
+        Version) bestehen und wird zurückgegeben.
+        """
+        with self._lock:
+            previous = self._current
+            hashes = DataSnapshot.sheet_hashes_for(farben_data, monday_data, lager_data, previous)
+            if previous.version > 0 and hashes == previous.sheet_hashes:
+                return previous
+            self._version += 1
+            snapshot = DataSnapshot.build(self._version, farben_data, monday_data, lager_data, load_stats,
+                                          previous=previous, engine=self.engine,
+                                          color_synonyms=self.color_synonyms, hashes=hashes)
+            self._current = snapshot
+        return snapshot
+
+
+def save_snapshot(snapshot: DataSnapshot, path: str, spreadsheet_id: str, source: str):
+    """
+    Schreibt die Tabellenblätter eines Stands atomar in eine Binärdatei.
+
+    Args:
+        spreadsheet_id: ID der Tabelle, aus der der Stand stammt
+        source: Datenquelle (z.B. 'live' oder 'fake:<fixture>')
+    """
+    payload = zlib.compress(json.dumps({
+        'spreadsheet_id': spreadsheet_id,
+        'source': source,
+        'version': snapshot.version,
+        'last_update': snapshot.last_update.isoformat() if snapshot.last_update else None,
+        'load_stats': snapshot.load_stats,
+        'farben_data': snapshot.farben_data,
+        'monday_data': snapshot.monday_data,
+        'lager_data': snapshot.lager_data
+    }, separators=(',', ':')).encode('utf-8'))
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_SCHEMA_VERSION, len(payload), hashlib.sha256(payload).digest())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(path: str, spreadsheet_id: str, source: str, engine: str = 'python',
+                  color_synonyms: Sequence[Sequence[str]] = ()) -> Optional[DataSnapshot]:
+    """
+    Liest einen gespeicherten Stand und baut die Indizes neu auf.
+
+    Returns:
+        Den Datenstand oder None, wenn die Datei fehlt, eine andere Schema-Version
+        hat, die Prüfsumme nicht stimmt oder sie aus einer anderen Tabelle bzw.
+        Datenquelle stammt
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, schema_version, length, checksum = _HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or schema_version != SNAPSHOT_SCHEMA_VERSION:
+                return None
+            payload = f.read(length)
+    except FileNotFoundError:
+        return None
+
+    if len(payload) != length or hashlib.sha256(payload).digest() != checksum:
+        return None
+
+    data = json.loads(zlib.decompress(payload).decode('utf-8'))
+    if data.get('spreadsheet_id') != spreadsheet_id or data.get('source') != source:
+        return None
+    last_update = datetime.fromisoformat(data['last_update']) if data.get('last_update') else None
+    return DataSnapshot.build(data['version'], data['farben_data'], data['monday_data'], data['lager_data'],
+                              data.get('load_stats'), last_update, engine=engine, color_synonyms=color_synonyms)
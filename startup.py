@@ -0,0 +1,75 @@
+"""
+Messung des Kaltstarts.
+
+Die Zeit vom Import der App bis zum ersten geladenen Datenstand wird in Phasen
+aufgeteilt (Importe, Authentifizierung, Client-Aufbau, erstes Laden) und einmal
+als Log-Eintrag ausgegeben. Überschreitet die Gesamtdauer das Startbudget
+(STARTUP_BUDGET_MS), wird eine Warnung geloggt.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Dauer der Startphasen in Millisekunden."""
+
+    def __init__(self, started: float, budget_ms: float = 0):
+        """
+        Args:
+            started: time.perf_counter() zu Beginn des Starts
+            budget_ms: Erlaubte Gesamtdauer (0 = keine Prüfung)
+        """
+        self.started = started
+        self.budget_ms = budget_ms
+        self.phases: Dict[str, float] = {}
+        self.total_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, duration_ms: float):
+        with self._lock:
+            self.phases[phase] = round(self.phases.get(phase, 0) + max(duration_ms, 0), 1)
+
+    def since(self, phase: str, started: float) -> float:
+        """Erfasst die Zeit seit started als Phase und gibt sie zurück."""
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.add(phase, duration_ms)
+        return duration_ms
+
+    def finish(self) -> bool:
+        """
+        Schließt die Messung ab und loggt die Aufschlüsselung (nur beim ersten Aufruf).
+
+        Returns:
+            False, wenn das Startbudget überschritten wurde
+        """
+        with self._lock:
+            if self.total_ms is not None:
+                return self.within_budget()
+            self.total_ms = round((time.perf_counter() - self.started) * 1000, 1)
+            phases = dict(self.phases)
+
+        logger.info("Start abgeschlossen", extra={'gesamt_ms': self.total_ms, 'phasen_ms': phases})
+        if not self.within_budget():
+            logger.warning("Startbudget überschritten", extra={
+                'gesamt_ms': self.total_ms,
+                'budget_ms': self.budget_ms,
+                'phasen_ms': phases
+            })
+            return False
+        return True
+
+    def within_budget(self) -> bool:
+        return not self.budget_ms or self.total_ms is None or self.total_ms <= self.budget_ms
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'gesamt_ms': self.total_ms,
+                'budget_ms': self.budget_ms or None,
+                'phasen_ms': dict(self.phases)
+            }
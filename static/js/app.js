@@ -7,6 +7,10 @@ class ProbepaketFinder {
         this.currentProduct = null;
         this.activeFields = 1; // Anzahl der aktiven Suchfelder
         this.maxFields = 4; // Maximale Anzahl der Suchfelder
+        this.pageSize = 20; // Pakete pro Seite der Suchergebnisse
+        this.lastSearch = null; // Letzte Suche (für Sortierung und "Weitere Pakete laden")
+        this.nextCursor = null;
+        this.shownPackages = 0;
         this.init();
     }
 
@@ -24,7 +28,7 @@ class ProbepaketFinder {
             if (data.success) {
                 this.products = data.products;
                 this.populateProductSelect();
-                this.updateLastUpdateTime(data.last_update);
+                this.updateLastUpdateTime(response.headers.get('X-Last-Update'));
             } else {
                 this.showToast('Fehler beim Laden der Produkte: ' + data.error, 'error');
             }
@@ -117,6 +121,26 @@ class ProbepaketFinder {
             e.preventDefault();
             this.performSearch();
         });
+
+        // Sortierung und weitere Seiten der Suchergebnisse
+        document.getElementById('sortSelect').addEventListener('change', () => {
+            if (this.lastSearch) {
+                this.hideResults();
+                this.fetchResults(false);
+            }
+        });
+        document.getElementById('loadMoreBtn').addEventListener('click', () => {
+            this.fetchResults(true);
+        });
+
+        // Keine Pakete mit allen Produkten: nach Anzahl erfüllter Kriterien sortiert suchen
+        document.getElementById('partialSearchBtn').addEventListener('click', () => {
+            if (this.lastSearch) {
+                this.lastSearch.partial = true;
+                this.hideResults();
+                this.fetchResults(false);
+            }
+        });
     }
 
     async performSearch() {
@@ -156,8 +180,18 @@ class ProbepaketFinder {
             }
         });
 
-        this.showLoading(true);
+        this.lastSearch = {
+            search_criteria: searchCriteria,
+            veredelung_required: veredelungRequired
+        };
         this.hideResults();
+        await this.fetchResults(false);
+    }
+
+    async fetchResults(append) {
+        this.showLoading(true);
+        const loadMoreBtn = document.getElementById('loadMoreBtn');
+        loadMoreBtn.disabled = true;
 
         try {
             const response = await fetch('/api/search', {
@@ -166,57 +200,77 @@ class ProbepaketFinder {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    search_criteria: searchCriteria,
-                    veredelung_required: veredelungRequired
+                    ...this.lastSearch,
+                    sort: document.getElementById('sortSelect').value,
+                    limit: this.pageSize,
+                    cursor: append ? this.nextCursor : null
                 })
             });
 
             const data = await response.json();
             
             if (data.success) {
-                this.displayResults(data.packages, data.search_params);
+                this.nextCursor = data.next_cursor;
+                this.displayResults(data.packages, data.search_params, data.gesamt, append);
             } else {
                 this.showToast('Fehler bei der Suche: ' + data.error, 'error');
             }
         } catch (error) {
             this.showToast('Fehler bei der Suche: ' + error.message, 'error');
         } finally {
+            loadMoreBtn.disabled = false;
             this.showLoading(false);
         }
     }
 
-    displayResults(packages, searchParams) {
+    displayResults(packages, searchParams, total, append = false) {
         const resultsSection = document.getElementById('resultsSection');
         const noResultsSection = document.getElementById('noResultsSection');
         const searchInfo = document.getElementById('searchInfo');
         const packagesList = document.getElementById('packagesList');
+        const loadMoreBtn = document.getElementById('loadMoreBtn');
+
+        if (!append) {
+            packagesList.innerHTML = '';
+            this.shownPackages = 0;
+        }
+        this.shownPackages += packages.length;
+        const gesamt = total ?? this.shownPackages;
 
         // Suchinfo anzeigen
         const criteria = searchParams.search_criteria || [];
         const searchText = criteria.map(c => `${c.product} (${c.color})`).join(', ');
+        const partial = Boolean(this.lastSearch && this.lastSearch.partial);
+        const countText = this.shownPackages < gesamt
+            ? `${this.shownPackages} von ${gesamt} Paketen angezeigt`
+            : `${gesamt} Pakete gefunden`;
+        const partialText = partial ? ' (auch Pakete, die nur einen Teil der Produkte enthalten)' : '';
         
         searchInfo.innerHTML = `
             <i class="fas fa-info-circle me-2"></i>
-            Suche nach: <strong>${searchText}</strong>
-            <span class="float-end">${packages.length} Pakete gefunden</span>
+            Suche nach: <strong>${searchText}</strong>${partialText}
+            <span class="float-end">${countText}</span>
         `;
 
-        if (packages.length === 0) {
+        if (gesamt === 0) {
             resultsSection.style.display = 'none';
             noResultsSection.style.display = 'block';
             noResultsSection.classList.add('fade-in');
+            // Teiltreffer nur anbieten, wenn mehrere Produkte gesucht wurden
+            document.getElementById('partialSearchBtn').style.display =
+                !partial && criteria.length > 1 ? 'inline-block' : 'none';
         } else {
             noResultsSection.style.display = 'none';
             resultsSection.style.display = 'block';
             resultsSection.classList.add('fade-in');
 
             // Pakete anzeigen
-            packagesList.innerHTML = '';
             packages.forEach((pkg, index) => {
                 const packageCard = this.createPackageCard(pkg, index);
                 packagesList.appendChild(packageCard);
             });
         }
+        loadMoreBtn.style.display = this.nextCursor ? 'block' : 'none';
     }
 
     createPackageCard(pkg, index) {
@@ -255,6 +309,14 @@ class ProbepaketFinder {
                     </small>
                     <br>
                     <small class="text-primary">${productList}</small>
+                    ${pkg.fehlend && pkg.fehlend.length > 0 ? `
+                        <br>
+                        <small class="text-warning">
+                            <i class="fas fa-exclamation-triangle me-1"></i>
+                            ${pkg.erfuellt} von ${pkg.kriterien} Produkten, es fehlt:
+                            ${pkg.fehlend.map(c => `${c.product} (${c.color})`).join(', ')}
+                        </small>
+                    ` : ''}
                     ${pkg.veredelungen && pkg.veredelungen.length > 0 ? `
                         <br>
                         <small class="text-muted">
@@ -318,9 +380,20 @@ class ProbepaketFinder {
             this.showToast('Daten werden aktualisiert...', 'info');
             
             const response = await fetch('/api/refresh');
-            const data = await response.json();
+            let data = await response.json();
             
-            if (data.success) {
+            if (data.success && data.bereits_laufend) {
+                this.showToast(data.message, 'info');
+            }
+            
+            // Aktualisierung läuft im Hintergrund - Status abfragen bis sie fertig ist
+            while (data.success && (data.status === 'queued' || data.status === 'running')) {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const statusResponse = await fetch(`/api/refresh/${data.job_id}`);
+                data = await statusResponse.json();
+            }
+            
+            if (data.success && data.status === 'done') {
                 this.showToast('Daten erfolgreich aktualisiert!', 'success');
                 await this.loadProducts();
                 this.updateLastUpdateTime(data.last_update);
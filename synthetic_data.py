@@ -0,0 +1,163 @@
+"""
+Synthetische Tabellenblätter für Benchmarks und lokale Tests.
+
+Erzeugt Werte-Raster im Aufbau der echten Tabellen (wie sie die Sheets API
+liefert: Listen von Zeilen, leere Zellen am Zeilenende abgeschnitten):
+
+- Lager_neu: Zeile 0 mit Paketnummern ab Spalte 2, Produktzeilen ab Zeile 4
+  (Produktname nur in der ersten Zeile eines Produkts, Größe in Spalte 1),
+  Veredelungszeilen 179-181. Bei mehr Produktzeilen, als davor Platz haben,
+  geht es nach den Veredelungszeilen weiter.
+- monday: Kopfzeile, dann "Probepaket N" mit Status und Lieferschein.
+- Farben: Produktzeile, darunter die Farben des Produkts.
+
+Die Ausgabe ist bei gleichem Seed identisch.
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+from paket_index import FIRST_PRODUCT_ROW
+
+# Nur Farben, die ProductCatalog an COLOR_WORDS als Farbzeile erkennt; sonst würden
+# die Farbzeilen in Farben als zusätzliche Produkte gezählt
+COLORS = (
+    'Black', 'White', 'Navy Blue', 'Royal Blue', 'Light Blue', 'Red', 'Burgundy Red', 'Bottle Green',
+    'Kelly Green', 'Heather Grey', 'Charcoal Grey', 'Pink', 'Orange', 'Yellow', 'Purple', 'Brown',
+    'Apricot', 'Off White', 'Forest Green', 'Sky Blue'
+)
+SIZES = ('XS', 'S', 'M', 'L', 'XL', 'XXL', '3XL')
+STATUSES = (('Im Lager', 0.6), ('Reserviert', 0.15), ('Versendet', 0.2), ('In Bearbeitung', 0.05))
+VEREDELUNGEN = ('Siebdruck', 'Digitaldruck', 'Stick')
+FIRST_VEREDELUNG_ROW = 179
+HEADER_LABELS = ('Kategorie', 'Hersteller', 'Bemerkung')
+
+# Vordefinierte Größen (Paketspalten, Produktzeilen)
+SCALES = {
+    'small': (200, 180),
+    'medium': (2000, 1000),
+    'large': (20000, 5000),
+}
+
+
+def parse_scale(value: str) -> Tuple[int, int]:
+    """'small' bzw. 'PAKETExZEILEN' (z.B. '2000x1000') -> (Paketspalten, Produktzeilen)."""
+    if value in SCALES:
+        return SCALES[value]
+    packages, _, rows = value.lower().partition('x')
+    return int(packages), int(rows)
+
+
+def generate_sheets(packages: int = 200, product_rows: int = 180, seed: int = 1, fill_rate: float = 0.3,
+                    colors_per_product: int = 6) -> Dict[str, List[List[str]]]:
+    """
+    Erzeugt Farben, monday und Lager_neu.
+
+    Args:
+        packages: Anzahl Paketspalten in Lager_neu
+        product_rows: Anzahl Produktzeilen (Produkt × Größe)
+        seed: Startwert des Zufallsgenerators
+        fill_rate: Anteil gefüllter Zellen in den Produktzeilen
+        colors_per_product: Anzahl Farben pro Produkt
+
+    Returns:
+        Tabellenblatt -> Werte (Listen von Zeilen)
+    """
+    rng = random.Random(seed)
+    package_numbers = [str(1000 + i) for i in range(packages)]
+
+    # Produkte mit je 3-7 Größen, bis die gewünschte Zeilenzahl erreicht ist
+    products: List[Tuple[str, List[str], List[str]]] = []
+    remaining = product_rows
+    while remaining > 0:
+        sizes = list(SIZES[:min(remaining, rng.randint(3, len(SIZES)))])
+        palette = rng.sample(COLORS, min(colors_per_product, len(COLORS)))
+        products.append((f'Produkt {len(products) + 1:04d}', sizes, palette))
+        remaining -= len(sizes)
+
+    # Kopfzeilen bis FIRST_PRODUCT_ROW: Paketnummern, danach Beschriftungen ohne Werte
+    lager = [['Nummer', ''] + package_numbers]
+    while len(lager) < FIRST_PRODUCT_ROW:
+        label = len(lager) - 1
+        lager.append([HEADER_LABELS[label]] if label < len(HEADER_LABELS) else [])
+    for name, sizes, palette in products:
+        for i, size in enumerate(sizes):
+            if len(lager) == FIRST_VEREDELUNG_ROW:
+                lager.extend(_veredelung_rows(rng, packages))
+            row = [name if i == 0 else '', size]
+            row.extend(rng.choice(palette) if rng.random() < fill_rate else '' for _ in range(packages))
+            lager.append(_trim(row))
+    while len(lager) < FIRST_VEREDELUNG_ROW:
+        lager.append([])
+    if len(lager) == FIRST_VEREDELUNG_ROW:
+        lager.extend(_veredelung_rows(rng, packages))
+
+    monday = [['Element', 'Person', 'Status', 'Lieferschein']]
+    status_names = [status for status, _ in STATUSES]
+    status_weights = [weight for _, weight in STATUSES]
+    for package_number in package_numbers:
+        # Nicht jedes Paket ist in monday erfasst
+        if rng.random() < 0.05:
+            continue
+        row = [f'Probepaket {package_number}', rng.choice(['Anna', 'Ben', 'Cem']),
+               rng.choices(status_names, status_weights)[0]]
+        if rng.random() < 0.5:
+            row.append(f'https://example.invalid/lieferschein/{package_number}.pdf')
+        monday.append(row)
+
+    farben = []
+    for name, _, palette in products:
+        farben.append([name])
+        farben.append(list(palette))
+
+    return {'Farben': farben, 'monday': monday, 'Lager_neu': lager}
+
+
+def _veredelung_rows(rng: random.Random, packages: int) -> List[List[str]]:
+    return [_trim([name, ''] + [rng.choice(('1', '1', '0', '')) for _ in range(packages)]) for name in VEREDELUNGEN]
+
+
+def _trim(row: List[str]) -> List[str]:
+    """Leere Zellen am Zeilenende fehlen auch in den Antworten der Sheets API."""
+    end = len(row)
+    while end > 2 and not row[end - 1]:
+        end -= 1
+    return row[:end]
+
+
+def generate_queries(sheets: Dict[str, List[List[str]]], count: int = 200, seed: int = 2,
+                     max_criteria: int = 4) -> List[Dict]:
+    """
+    Suchanfragen im Format von /api/search über die Produkte und Farben aus Farben.
+
+    Gemischt werden 1 bis max_criteria Kriterien, Katalogfarben, "Egal",
+    Teilstrings und optional geforderte Veredelungen.
+    """
+    rng = random.Random(seed)
+    catalog = _catalog(sheets['Farben'])
+    names = list(catalog)
+    queries = []
+    for _ in range(count):
+        criteria = []
+        for _ in range(rng.randint(1, max_criteria)):
+            product = rng.choice(names)
+            color = rng.choice(catalog[product] + ['Egal', 'Egal', 'Blue', 'Grey'])
+            criteria.append({'product': product, 'color': color})
+        veredelung = rng.choice([[], [], [], ['Siebdruck'], ['Stick'], ['Digitaldruck', 'Stick']])
+        queries.append({'search_criteria': criteria, 'veredelung_required': veredelung})
+    return queries
+
+
+def _catalog(farben: List[List[str]]) -> Dict[str, List[str]]:
+    catalog = {}
+    for i in range(0, len(farben) - 1, 2):
+        catalog[farben[i][0]] = list(farben[i + 1])
+    return catalog
+
+
+def package_numbers(sheets: Dict[str, List[List[str]]], count: Optional[int] = None, seed: int = 3) -> List[str]:
+    """Zufällige Paketnummern aus Lager_neu (z.B. für get_veredelung_info)."""
+    numbers = sheets['Lager_neu'][0][2:]
+    if count is None or count >= len(numbers):
+        return list(numbers)
+    return random.Random(seed).sample(numbers, count)
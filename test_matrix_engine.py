@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Prüft, dass SEARCH_ENGINE=numpy dieselben Treffer liefert wie die Suche über PaketIndex.
+
+Gestreamte Suchen (Fundreihenfolge, ohne Ergebnis-Cache) müssen dieselben Pakete liefern.
+Grundlage sind die synthetischen Tabellenblätter und Suchanfragen aus synthetic_data.
+Aufruf: python -m unittest test_matrix_engine
+"""
+
+import unittest
+
+import numpy as np
+
+import app as webapp
+from ranking import PageRequest
+from result_cache import SearchResultCache
+from synthetic_data import generate_queries, generate_sheets
+
+
+class EngineEquivalenceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Mehr Produktzeilen als vor den Veredelungszeilen Platz haben
+        cls.sheets = generate_sheets(packages=300, product_rows=400, seed=7)
+        cls.queries = generate_queries(cls.sheets, count=300, seed=8)
+        cls.finders = {}
+        for engine in ('python', 'numpy'):
+            finder = webapp.ProbepaketFinder('test', service=object(), engine=engine)
+            finder.result_cache.max_entries = 0
+            finder.store.publish(cls.sheets['Farben'], cls.sheets['monday'], cls.sheets['Lager_neu'])
+            cls.finders[engine] = finder
+
+    def _both(self, search):
+        return [search(self.finders[engine]) for engine in ('python', 'numpy')]
+
+    def test_matrix_uses_smallest_code_type(self):
+        matrix = self.finders['numpy'].snapshot.matrix
+        self.assertEqual(matrix.codes.dtype, np.min_scalar_type(len(matrix.colors)))
+        self.assertLessEqual(matrix.codes.max(), len(matrix.colors) - 1)
+
+    def test_find_matching_packages(self):
+        hits = 0
+        for query in self.queries:
+            python, numpy = self._both(lambda finder: finder.find_matching_packages(
+                query['search_criteria'], query['veredelung_required']))
+            self.assertEqual(python, numpy, query)
+            hits += bool(python)
+        self.assertGreater(hits, 0)
+
+    def test_streamed_matches(self):
+        def number(package):
+            return package['nummer']
+
+        for engine, finder in self.finders.items():
+            for query in self.queries[:100]:
+                for min_criteria in (None, 1):
+                    streamed = list(finder.iter_matching_packages(query['search_criteria'],
+                                                                  query['veredelung_required'],
+                                                                  min_criteria=min_criteria))
+                    packages, _, _ = finder.search_page(query['search_criteria'], query['veredelung_required'],
+                                                            min_criteria=min_criteria)
+                    self.assertEqual(sorted(streamed, key=number), sorted(packages, key=number), (engine, query))
+
+    def test_streamed_matches_bypass_cache(self):
+        finder = self.finders['python']
+        finder.result_cache = SearchResultCache()
+        try:
+            for query in self.queries[:20]:
+                list(finder.iter_matching_packages(query['search_criteria'], query['veredelung_required']))
+            stats = finder.result_cache.stats()
+            self.assertEqual((stats['eintraege'], stats['hits'], stats['misses']), (0, 0, 0))
+        finally:
+            finder.result_cache = SearchResultCache(max_entries=0)
+
+    def test_partial_search_pages(self):
+        for sort in ('relevanz', 'groessen', 'veredelung', 'nummer'):
+            page = PageRequest(sort=sort, limit=20)
+            for query in self.queries[:100]:
+                def search(finder):
+                    packages, total, cursor = finder.search_page(
+                        query['search_criteria'], query['veredelung_required'], page=page, min_criteria=1)
+                    return list(packages), total, cursor
+                python, numpy = self._both(search)
+                self.assertEqual(python, numpy, (sort, query))
+
+
+if __name__ == '__main__':
+    unittest.main()
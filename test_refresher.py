@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Prüft den Takt der Hintergrund-Aktualisierung: fällige Bereiche werden kurz
+nach Ablauf ihrer TTL geladen, nicht erst einen weiteren Durchlauf später.
+Angeforderte Aktualisierungen laden vollständig, auch während eines periodischen Durchlaufs.
+Aufruf: python -m unittest test_refresher
+"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from refresher import BackgroundRefresher, RefreshSchedule
+
+
+class RefreshScheduleTest(unittest.TestCase):
+
+    def test_seconds_until_due(self):
+        schedule = RefreshSchedule({'monday': 60, 'Lager_neu': 600, 'Lager_neu:header': 0})
+        self.assertEqual(schedule.seconds_until_due(now=100), 0)
+        schedule.mark_fetched(['monday', 'Lager_neu'], now=100)
+        self.assertEqual(schedule.seconds_until_due(now=130), 30)
+        self.assertEqual(schedule.seconds_until_due(now=200), 0)
+        self.assertIsNone(RefreshSchedule({'monday': 0}).seconds_until_due())
+
+
+class RefreshDelayTest(unittest.TestCase):
+
+    def test_jitter_only_delays(self):
+        refresher = BackgroundRefresher(lambda reason: None, interval=60, jitter=6, due_in=lambda: 45)
+        with mock.patch('refresher.random.uniform', side_effect=lambda low, high: low):
+            self.assertEqual(refresher._next_delay(), 45)
+        with mock.patch('refresher.random.uniform', side_effect=lambda low, high: high):
+            self.assertEqual(refresher._next_delay(), 51)
+
+    def test_interval_is_upper_bound_and_backoff_after_failure(self):
+        refresher = BackgroundRefresher(lambda reason: None, interval=60, jitter=0, due_in=lambda: 600)
+        self.assertEqual(refresher._next_delay(), 60)
+        refresher.due_in = lambda: 0
+        refresher._scheduled_failed = True
+        self.assertEqual(refresher._next_delay(), 60)
+
+    def test_scheduled_loads_follow_ttl(self):
+        ttl = 0.3
+        schedule = RefreshSchedule({'monday': ttl})
+        schedule.mark_fetched(['monday'])
+        loads = []
+
+        def refresh(reason):
+            due = schedule.due()
+            if due:
+                loads.append(time.monotonic())
+                schedule.mark_fetched(due)
+
+        refresher = BackgroundRefresher(refresh, interval=ttl, jitter=ttl * 0.1,
+                                        due_in=schedule.seconds_until_due)
+        refresher.min_delay = 0.01
+        refresher.start()
+        try:
+            time.sleep(ttl * 8)
+        finally:
+            refresher.stop()
+        gaps = [later - earlier for earlier, later in zip(loads, loads[1:])]
+        self.assertGreaterEqual(len(gaps), 4)
+        # Ohne Ausrichtung an der TTL lägen einzelne Abstände bei etwa 2 × TTL
+        self.assertLess(max(gaps), ttl * 1.5, gaps)
+
+
+class TriggerTest(unittest.TestCase):
+
+    def test_manual_refresh_does_not_join_running_scheduled_job(self):
+        started, release = threading.Event(), threading.Event()
+        reasons = []
+
+        def refresh(reason):
+            reasons.append(reason)
+            if reason == 'scheduled':
+                started.set()
+                release.wait(5)
+
+        refresher = BackgroundRefresher(refresh, interval=0.05, jitter=0, due_in=lambda: 0)
+        refresher.min_delay = 0.01
+        refresher.start()
+        try:
+            self.assertTrue(started.wait(5))
+            job = refresher.trigger('manual')
+            self.assertFalse(job['coalesced'])
+            # Weitere Anfragen teilen sich den vollständigen Auftrag
+            self.assertEqual(refresher.trigger('manual')['id'], job['id'])
+            refresher.due_in = lambda: 60
+            release.set()
+            deadline = time.monotonic() + 5
+            while refresher.job_status(job['id'])['status'] != 'done' and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            refresher.stop()
+        self.assertEqual(refresher.job_status(job['id'])['status'], 'done')
+        self.assertEqual(reasons[:2], ['scheduled', 'manual'])
+
+    def test_queued_scheduled_job_becomes_full_load(self):
+        refresher = BackgroundRefresher(lambda reason: None, interval=0)
+        with refresher._lock:
+            scheduled = refresher._register(refresher._new_job('scheduled'))
+            refresher._active = scheduled
+        job = refresher.trigger('manual')
+        self.assertTrue(job['coalesced'])
+        self.assertEqual(job['id'], scheduled['id'])
+        self.assertEqual(job['reason'], 'manual')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Prüft, dass ein gespeicherter Datenstand nur für dieselbe Tabelle und Datenquelle übernommen wird.
+Aufruf: python -m unittest test_snapshot
+"""
+
+import os
+import tempfile
+import unittest
+
+from snapshot import DataSnapshot, load_snapshot, save_snapshot
+from synthetic_data import generate_sheets
+
+
+class SnapshotFileTest(unittest.TestCase):
+
+    def setUp(self):
+        sheets = generate_sheets(packages=20, product_rows=30)
+        self.snapshot = DataSnapshot.build(3, sheets['Farben'], sheets['monday'], sheets['Lager_neu'])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'snapshot.bin')
+        save_snapshot(self.snapshot, self.path, 'tabelle-a', 'live')
+
+    def test_roundtrip(self):
+        restored = load_snapshot(self.path, 'tabelle-a', 'live')
+        self.assertEqual(restored.version, 3)
+        self.assertEqual(restored.sheet_hashes, self.snapshot.sheet_hashes)
+
+    def test_other_spreadsheet_or_source_is_ignored(self):
+        self.assertIsNone(load_snapshot(self.path, 'tabelle-b', 'live'))
+        self.assertIsNone(load_snapshot(self.path, 'tabelle-a', 'fake:/tmp/sheets_fixture.json'))
+
+    def test_missing_file(self):
+        self.assertIsNone(load_snapshot(self.path + '.fehlt', 'tabelle-a', 'live'))
+
+
+if __name__ == '__main__':
+    unittest.main()